@@ -1,10 +1,13 @@
+import functools
 import os
 import platform
 import subprocess
 import shutil
 import tempfile
 
+@functools.lru_cache(maxsize=1)
 def detect_os():
+    # The platform never changes within a run, so resolve it once
     system = platform.system()
     if system == "Linux":
         return "linux"
@@ -16,57 +19,119 @@ def detect_os():
         raise RuntimeError("Unsupported operating system")
 
 
+@functools.lru_cache(maxsize=1)
 def find_7z():
-    # Try locating 7z in PATH
-    for cmd in ("7z", "7z.exe"):
-        path = shutil.which(cmd)
+    # Try PATH first, then the common installation directories
+    candidates = (
+        "7z",
+        "7z.exe",
+        r"C:\Program Files\7-Zip\7z.exe",
+        r"C:\Program Files (x86)\7-Zip\7z.exe",
+    )
+    for cmd in candidates:
+        path = shutil.which(cmd) or (os.path.isfile(cmd) and cmd)
         if path:
             return path
-    # Check common installation directories
-    possible_paths = [
-        r"C:\Program Files\7-Zip\7z.exe",
-        r"C:\Program Files (x86)\7-Zip\7z.exe"
-    ]
-    for p in possible_paths:
-        if os.path.isfile(p):
-            return p
     raise RuntimeError("7-Zip executable not found. Please install 7-Zip or add it to your PATH.")
 
 
-def mount_iso(iso_path, mount_point):
-    os_type = detect_os()
-    if os_type == "linux":
-        subprocess.run(["sudo", "mount", "-o", "loop", iso_path, mount_point], check=True)
-    elif os_type == "mac":
-        subprocess.run(["hdiutil", "attach", iso_path, "-mountpoint", mount_point], check=True)
-    elif os_type == "windows":
-        # Requires 7z installed or PowerShell ISO mounting
-        subprocess.run(["7z", "x", iso_path, f"-o{mount_point}"], check=True)
-    else:
-        raise RuntimeError("Unsupported OS for mounting")
+def _mount_linux(iso_path, mount_point):
+    subprocess.run(["sudo", "mount", "-o", "loop", iso_path, mount_point], check=True)
+    return mount_point
+
+def _mount_mac(iso_path, mount_point):
+    subprocess.run(["hdiutil", "attach", iso_path, "-mountpoint", mount_point], check=True)
+    return mount_point
+
+def _mount_windows(iso_path, mount_point):
+    # ISO9660 is not compressed, so a native mount beats extracting it with 7z
+    image_path = iso_path.replace("'", "''")
+    result = subprocess.run(
+        ["powershell", "-NoProfile", "-Command",
+         f"(Mount-DiskImage -ImagePath '{image_path}' -PassThru | Get-Volume).DriveLetter"],
+        check=True, capture_output=True, text=True
+    )
+    drive_letter = result.stdout.strip()
+    if not drive_letter:
+        # Already attached elsewhere, or the volume got no letter; main()
+        # falls back to extracting the image with 7z
+        raise OSError(f"No drive letter assigned to mounted image {iso_path}")
+    return f"{drive_letter}:\\"
+
+def _unmount_linux(mount_point):
+    # Lazy unmount: detach now even if something still holds a reference,
+    # so the mount point directory can be removed right away
+    subprocess.run(["sudo", "umount", "-l", mount_point], check=True)
+
+def _unmount_mac(mount_point):
+    subprocess.run(["hdiutil", "detach", mount_point], check=True)
+
+def _unmount_windows(mount_point):
+    subprocess.run(
+        ["powershell", "-NoProfile", "-Command",
+         f"Get-Volume -DriveLetter {mount_point[0]} | Get-DiskImage | Dismount-DiskImage"],
+        check=True
+    )
+
+def _run_installer_unix(mount_point, install_dir):
+    install_script = os.path.join(mount_point, "install.sh")
+    install_dir = os.path.abspath(install_dir)
 
-def unmount_iso(mount_point):
-    os_type = detect_os()
-    if os_type == "linux":
-        subprocess.run(["sudo", "umount", mount_point], check=True)
-    elif os_type == "mac":
-        subprocess.run(["hdiutil", "detach", mount_point], check=True)
-    elif os_type == "windows":
-        # Nothing needed if using 7z
-        pass
+    subprocess.run(
+        [install_script, "-d", install_dir, "-f"],
+        cwd="/tmp",
+        check=True
+    )
 
-def run_installer(mount_point, install_dir):
-    os_type = detect_os()
-    install_script = os.path.join(mount_point, "install.sh")
+def _batch_command(script, *args):
+    """Build a command line that runs a batch script through cmd.exe /c.
+
+    cmd.exe removes the outermost pair of quotes from what follows /c, so the
+    individually quoted script and arguments are wrapped in one more pair.
+    """
+    comspec = os.environ.get("COMSPEC", "cmd.exe")
+    return f'"{comspec}" /c "{subprocess.list2cmdline([script, *args])}"'
 
-    if os_type in ["linux", "mac"]:
-        install_dir = os.path.abspath(install_dir)
+def _run_installer_windows(mount_point, install_dir):
+    installer = os.path.join(mount_point, "install.bat")
+    subprocess.run(_batch_command(installer, install_dir), cwd=mount_point, check=True)
 
-        subprocess.run(
-            [install_script, "-d", install_dir, "-f"],
-            cwd="/tmp",
-            check=True
-        )
+# Per-OS implementations, keyed by detect_os()
+_MOUNT_DISPATCH = {"linux": _mount_linux, "mac": _mount_mac, "windows": _mount_windows}
+_UNMOUNT_DISPATCH = {"linux": _unmount_linux, "mac": _unmount_mac, "windows": _unmount_windows}
+_INSTALLER_DISPATCH = {"linux": _run_installer_unix, "mac": _run_installer_unix, "windows": _run_installer_windows}
+
+def mount_iso(iso_path, mount_point=None):
+    """Mount the ISO and return the directory it is reachable under.
+
+    On Windows the image is attached natively and Windows picks the drive
+    letter, so mount_point is ignored and the drive root is returned.
+    """
+    return _MOUNT_DISPATCH[detect_os()](iso_path, mount_point)
+
+def unmount_iso(mount_point):
+    _UNMOUNT_DISPATCH[detect_os()](mount_point)
+
+def run_installer(mount_point, install_dir):
+    _INSTALLER_DISPATCH[detect_os()](mount_point, install_dir)
+
+def extract_iso(iso_path, output_dir):
+    """Extract the ISO with 7-Zip and return the directory holding install.bat."""
+    print(f"Extracting ISO to {output_dir}")
+    os.makedirs(output_dir, exist_ok=True)
+    seven_z = find_7z()
+    # -mmt=on: use all cores; -bso0/-bsp0: no per-file output or progress; -y: never prompt
+    subprocess.run(
+        [seven_z, "x", iso_path, f"-o{output_dir}", "-mmt=on", "-bso0", "-bsp0", "-y"],
+        check=True
+    )
+    print("Extraction complete.")
+
+    # Detect nested folder
+    entries = os.listdir(output_dir)
+    if len(entries) == 1 and os.path.isdir(os.path.join(output_dir, entries[0])):
+        return os.path.join(output_dir, entries[0])
+    return output_dir
 
 def main(iso_path, output_dir):
     os_type = detect_os()
@@ -76,32 +141,52 @@ def main(iso_path, output_dir):
         iso_path = os.path.abspath(iso_path)
         output_dir = os.path.abspath(output_dir) if output_dir else None
         output_dir = output_dir or os.path.splitext(iso_path)[0] + '_extr'
-        print(f"Extracting ISO to {output_dir}")
-        os.makedirs(output_dir, exist_ok=True)
-        seven_z = find_7z()
-        subprocess.run([seven_z, "x", iso_path, f"-o{output_dir}"], check=True)
-        print("Extraction complete.")
-
-        # Detect nested folder
-        entries = os.listdir(output_dir)
-        if len(entries) == 1 and os.path.isdir(os.path.join(output_dir, entries[0])):
-            source_dir = os.path.join(output_dir, entries[0])
-        else:
-            source_dir = output_dir
 
-        print(f"Running installer in {source_dir}")
-        installer = os.path.join(source_dir, "install.bat")
-        # Execute batch installer directly; it will install to assumed location
-        subprocess.run(installer, shell=True, cwd=source_dir, check=True)
+        try:
+            print(f"Mounting ISO {iso_path}")
+            mount_point = mount_iso(iso_path)
+        except (OSError, subprocess.CalledProcessError) as e:
+            # PowerShell unavailable or mounting not permitted: fall back to 7z
+            print(f"Mounting failed ({e}), falling back to extraction")
+            # Extract to a scratch directory, not output_dir, so the installer
+            # installs into output_dir as it does from a mounted image
+            extract_dir = tempfile.mkdtemp(prefix="spec-iso-")
+            try:
+                source_dir = extract_iso(iso_path, extract_dir)
+
+                print(f"Installing to {output_dir}")
+                os.makedirs(output_dir, exist_ok=True)
+                run_installer(source_dir, output_dir)
+            finally:
+                print("Cleaning up...")
+                shutil.rmtree(extract_dir, ignore_errors=True)
+        else:
+            try:
+                print(f"Installing to {output_dir}")
+                os.makedirs(output_dir, exist_ok=True)
+                run_installer(mount_point, output_dir)
+            finally:
+                print("Cleaning up...")
+                unmount_iso(mount_point)
         print("Installation complete.")
         
     elif os_type == "linux" or os_type == "mac":
         # Linux/macOS flow: mount and install with explicit output_dir
-        mount_point = tempfile.mkdtemp()
+        mount_point = tempfile.mkdtemp(prefix="spec-iso-")
         try:
             print(f"Mounting ISO to {mount_point}")
             mount_iso(iso_path, mount_point)
+        except BaseException:
+            # Usually nothing was mounted and the directory is still empty; if
+            # the mount did succeed (e.g. interrupted right after), rmdir fails
+            # and the original exception must still be the one raised
+            try:
+                os.rmdir(mount_point)
+            except OSError:
+                pass
+            raise
 
+        try:
             print(f"Installing to {output_dir}")
             os.makedirs(output_dir, exist_ok=True)
             run_installer(mount_point, output_dir)
@@ -109,7 +194,9 @@ def main(iso_path, output_dir):
         finally:
             print("Cleaning up...")
             unmount_iso(mount_point)
-            shutil.rmtree(mount_point)
+            # Only reached after a successful unmount; rmdir removes the empty
+            # mount point and never descends into a still-mounted image
+            os.rmdir(mount_point)
 
 if __name__ == "__main__":
     iso_path = "cpu2017-1_0_5.iso"
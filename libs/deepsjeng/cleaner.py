@@ -16,260 +16,329 @@ import sys
 import argparse
 from pathlib import Path
 import shutil
-
-class SpecCodeCleaner:
-    def __init__(self):
-        # Patterns to identify and clean SPEC-specific code
-        self.patterns = {
-            # Remove SPEC conditional compilation for const qualifiers
-            'const_conditional': {
-                'pattern': r'#if !defined\(SPEC\)\s*\nconst\s*\n#endif\s*\n',
-                'replacement': 'const ',
-                'description': 'Restore const qualifiers'
-            },
-
-            # Remove SPEC version strings
-            'version_spec': {
-                'pattern': r'#define VERSION "([^"]*)\s+SPEC"',
-                'replacement': r'#define VERSION "\1"',
-                'description': 'Remove SPEC from version string'
-            },
-
-            # Remove SPEC package name modifications
-            'package_spec': {
-                'pattern': r'#define PACKAGE "([^"]*)\s+SPEC"',
-                'replacement': r'#define PACKAGE "\1"',
-                'description': 'Remove SPEC from package name'
-            },
-
-            # Remove SPEC-specific function declarations
-            'spec_function_decl': {
-                'pattern': r'#if !defined\(SPEC\)\s*\n([^#]*?)\n#else\s*\n([^#]*?)\n#endif',
-                'replacement': r'\1',
-                'description': 'Use non-SPEC function declarations'
-            },
-
-            # Remove SPEC ifdefs around single statements
-            'spec_ifdef_block': {
-                'pattern': r'#if defined\(SPEC\)\s*\n(.*?)\n#else\s*\n(.*?)\n#endif',
-                'replacement': r'\2',
-                'description': 'Use non-SPEC code blocks'
-            },
-
-            # Remove standalone SPEC conditionals
-            'spec_standalone': {
-                'pattern': r'#ifdef SPEC\s*\n.*?\n#endif\s*\n',
-                'replacement': '',
-                'description': 'Remove SPEC-only code blocks'
-            },
-
-            # Clean up SPEC comments
-            'spec_comments': {
-                'pattern': r'/\*.*?SPEC.*?\*/',
-                'replacement': '',
-                'description': 'Remove SPEC-related comments'
-            },
-
-            # Remove SPEC configuration defines
-            'spec_defines': {
-                'pattern': r'#define\s+.*SPEC.*\n',
-                'replacement': '',
-                'description': 'Remove SPEC defines'
-            },
-
-            # Remove SPEC memory configuration blocks
-            'spec_memory_config': {
-                'pattern': r'#ifdef SMALL_MEMORY\s*\n.*?\n#elif BIG_MEMORY\s*\n.*?\n#else\s*\n#error Need to specify SMALL_MEMORY or BIG_MEMORY\.\s*\n#endif',
-                'replacement': 'TTSize = 15000000; // Default hash size',
-                'description': 'Replace SPEC memory configuration with default'
-            },
-
-            # Remove SPEC copyright protection blocks
-            'spec_copyprotection': {
-                'pattern': r'#if !defined COPYPROTECTION\s*\n(.*?)\n#endif',
-                'replacement': r'\1',
-                'description': 'Remove copy protection conditional compilation'
-            },
-
-            # Remove SPEC commandline handling
-            'spec_commandline': {
-                'pattern': r'/\* SPEC version: take EPD testset from commandline \*/\s*\n\s*if \(argc == 2\) \{\s*\n\s*run_epd_testsuite\(&gamestate, &state, argv\[1\]\);\s*\n\s*\} else \{\s*\n\s*myprintf\("Please specify the workfile\\n"\);\s*\n\s*return EXIT_FAILURE;\s*\n\s*\}',
-                'replacement': '/* Normal UCI/XBoard interface would go here */',
-                'description': 'Remove SPEC-specific EPD testset command line handling'
-            },
-
-            # Remove SPEC MAX_CPU limitations
-            'spec_max_cpu': {
-                'pattern': r'static pawntt_t PawnTT\[MAX_CPU\]\[1 << PAWN_HASH_LOG\];',
-                'replacement': 'static pawntt_t PawnTT[1][1 << PAWN_HASH_LOG];',
-                'description': 'Remove multi-CPU SPEC limitations'
-            },
-
-            # Remove SPEC thread restrictions
-            'spec_thread_restrictions': {
-                'pattern': r'int history_h\[MAX_CPU\]\[12\]\[64\];\s*\nint history_hit\[MAX_CPU\]\[12\]\[64\];\s*\nint history_tot\[MAX_CPU\]\[12\]\[64\];',
-                'replacement': 'int history_h[1][12][64];\nint history_hit[1][12][64];\nint history_tot[1][12][64];',
-                'description': 'Remove SPEC multi-threading restrictions'
-            },
-
-            # Restore normal UCI mode behavior
-            'spec_uci_mode': {
-                'pattern': r'uci_mode = FALSE;',
-                'replacement': 'uci_mode = TRUE;',
-                'description': 'Enable UCI mode by default'
-            },
-
-            # Remove SPEC-specific phase detection
-            'spec_phase_detection': {
-                'pattern': r'/\* quadratic scaling y = -0,0039x2 \+ 0,9954x \+ 13,2572 \*/',
-                'replacement': '/* Standard king safety scaling */',
-                'description': 'Remove SPEC-specific evaluation scaling comment'
-            },
-
-            # Remove SPEC zobrist hash generation - simpler approach
-            'spec_zobrist_temp_var': {
-                'pattern': r'#if defined\(SPEC\)\s*\n\s*BITBOARD temp;\s*\n#endif',
-                'replacement': '',
-                'description': 'Remove SPEC temp variable declaration'
-            },
-
-            'spec_zobrist_assignment': {
-                'pattern': r'#if defined\(SPEC\)\s*\n\s*temp = \(\(BITBOARD\)myrandom\(\)\) << 32;\s*\n\s*temp \+= \(BITBOARD\)myrandom\(\);\s*\n\s*zobrist\[p\]\[q\] = temp;\s*\n#else\s*\n\s*zobrist\[p\]\[q\] = \(\(\(BITBOARD\)myrandom\(\)\) << 32\) \+ \(BITBOARD\)myrandom\(\);\s*\n#endif',
-                'replacement': '            zobrist[p][q] = (((BITBOARD)myrandom()) << 32) + (BITBOARD)myrandom();',
-                'description': 'Use non-SPEC zobrist hash generation'
-            },
-
-            # Remove SPEC Windows detection
-            'spec_windows_detection': {
-                'pattern': r'#if defined\(WIN32\) \|\| defined\(WIN64\) \|\| defined\(SPEC_WINDOWS\)',
-                'replacement': '#if defined(WIN32) || defined(WIN64)',
-                'description': 'Remove SPEC_WINDOWS detection'
-            },
-
-            # Remove SPEC logging conditionals
-            'spec_logging_conditional': {
-                'pattern': r'#if !defined COPYPROTECTION\s*\n(.*?)\n#endif',
-                'replacement': r'\1',
-                'description': 'Remove copy protection conditional compilation'
-            },
-
-            # Remove this pattern entirely - it's causing issues
-            # 'spec_threadid_references': {
-            #     'pattern': r's->threadid',
-            #     'replacement': '0',
-            #     'description': 'Replace SPEC threadid with single thread'
-            # },
-
-            # Pattern for any remaining MAX_CPU arrays
-            'spec_max_cpu_arrays': {
-                'pattern': r'\[MAX_CPU\]',
-                'replacement': '[1]',
-                'description': 'Replace MAX_CPU array dimensions with single element'
-            },
-
-            # Pattern for SPEC benchmark identification
-            'spec_benchmark_comments': {
-                'pattern': r'/\*.*SPEC.*benchmark.*\*/',
-                'replacement': '',
-                'description': 'Remove SPEC benchmark identification comments'
-            },
-
-            # Remove SPEC-specific CPU count defines
-            'spec_cpu_defines': {
-                'pattern': r'#define\s+MAX_CPU\s+\d+',
-                'replacement': '#define MAX_CPU 1',
-                'description': 'Set MAX_CPU to 1'
-            },
-
-            # Remove SPEC memory size defines
-            'spec_memory_defines': {
-                'pattern': r'#define\s+(SMALL_MEMORY|BIG_MEMORY)\s*',
-                'replacement': '',
-                'description': 'Remove SPEC memory size defines'
-            },
-
-            # Remove SPEC performance measurement code
-            'spec_performance_code': {
-                'pattern': r'/\*\s*SPEC:\s*.*?\*/',
-                'replacement': '',
-                'description': 'Remove SPEC performance measurement comments'
-            },
-
-            # Fix SPEC-modified time measurement
-            'spec_time_measurement': {
-                'pattern': r'#if\s+defined\(SPEC\)\s*\n.*?return\s+0;\s*\n.*?#else\s*\n(.*?)\n#endif',
-                'replacement': r'\1',
-                'description': 'Use real time measurement instead of SPEC stub'
-            },
-
-            # Remove SPEC test environment setup
-            'spec_test_env': {
-                'pattern': r'/\*\s*SPEC\s+version:.*?\*/',
-                'replacement': '',
-                'description': 'Remove SPEC test environment comments'
-            }
-        }
-
-        # Additional cleanups for restored functionality
-        self.restorations = {
-            # Restore typical chess engine features that SPEC might have disabled
-            'enable_pondering': {
-                'pattern': r'int allow_pondering\s*=\s*FALSE;',
-                'replacement': 'int allow_pondering = TRUE;',
-                'description': 'Ensure pondering is enabled'
-            },
-
-            'enable_logging': {
-                'pattern': r'int cfg_logging\s*=\s*0;',
-                'replacement': 'int cfg_logging = 1;',
-                'description': 'Re-enable logging'
-            },
-
-            # Restore dynamic behavior
-            'restore_randomization': {
-                'pattern': r'\/\* SPEC: randomization disabled \*\/',
-                'replacement': '',
-                'description': 'Remove randomization disable comments'
-            },
-
-            # Restore normal chess engine main function
-            'restore_main_function': {
-                'pattern': r'mysrand\(12345\);',
-                'replacement': 'mysrand((unsigned int)time(NULL));',
-                'description': 'Use proper random seed instead of fixed SPEC seed'
-            },
-
-            # Restore normal time controls
-            'restore_time_controls': {
-                'pattern': r'gamestate\.time_left = 15 \* 60 \* 100;',
-                'replacement': 'gamestate.time_left = 300 * 100; // 5 minutes default',
-                'description': 'Set reasonable default time control'
-            },
-
-            # Remove SPEC fixed seed
-            'remove_fixed_seed': {
-                'pattern': r'mysrand\(12345\);',
-                'replacement': 'mysrand((unsigned int)time(NULL));',
-                'description': 'Use time-based random seed'
-            },
-
-            # Remove SPEC hardcoded seeds - more specific
-            'remove_hardcoded_seeds_31657': {
-                'pattern': r'mysrand\(31657\);',
-                'replacement': 'mysrand((unsigned int)time(NULL));',
-                'description': 'Use time-based random seed instead of hardcoded 31657'
-            },
-
-            'remove_hardcoded_seeds_12345': {
-                'pattern': r'mysrand\(12345\);',
-                'replacement': 'mysrand((unsigned int)time(NULL));',
-                'description': 'Use time-based random seed instead of hardcoded 12345'
-            },
-
-            # Restore time functions
-            'restore_time_functions': {
-                'pattern': r'int rtime\( void \)\s*\{\s*\n\s*return 0;\s*\n\}',
-                'replacement': '''int rtime(void) {
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+# The directory walker shared by the cleaners lives in libs/, one level up
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from source_tree import iter_files
+
+# Ad-hoc patterns used directly by clean_file_content, compiled once at import
+THREADID_ASSIGNMENT_RE = re.compile(rb's->threadid\s*=\s*[^;]+;')
+THREADID_ZERO = b's->threadid = 0;'
+THREADID_ZERO_COMMENT = b'/* s->threadid = 0; // Removed for single-thread operation */'
+EXTRA_BLANK_LINES_RE = re.compile(rb'\n\s*\n\s*\n')
+# Only matches 'const' followed by anything other than exactly one space, i.e. the
+# places where normalizing the spacing actually changes the text
+CONST_SPACING_RE = re.compile(rb'const(?: \s+|[^\S ]\s*)(\w)')
+
+# Preprocessor lines that open a SPEC conditional; group 1 or 2 is set when the
+# SPEC branch is the #else side (#if !defined(SPEC), #ifndef SPEC)
+SPEC_CONDITIONAL_RE = re.compile(
+    rb'[ \t]*#[ \t]*(?:if[ \t]+(!?)[ \t]*defined[ \t]*(?:\([ \t]*SPEC[ \t]*\)|[ \t]+SPEC)|(ifndef|ifdef)[ \t]+SPEC)[ \t\r]*'
+)
+DIRECTIVE_RE = re.compile(rb'[ \t]*#[ \t]*(if|ifdef|ifndef|elif|else|endif)\b')
+
+def _resolve_spec_conditionals(lines, fired):
+    """Return lines with every SPEC conditional replaced by its non-SPEC branch.
+
+    Nested conditionals are tracked by depth, so an inner #else/#endif is never
+    mistaken for the SPEC block's own. Blocks with an #elif at their top level,
+    or without a matching #endif, are left untouched.
+    """
+    out = []
+    i = 0
+    while i < len(lines):
+        match = SPEC_CONDITIONAL_RE.fullmatch(lines[i])
+        if match is None:
+            out.append(lines[i])
+            i += 1
+            continue
+
+        else_at = end_at = None
+        depth = 0
+        for j in range(i + 1, len(lines)):
+            if not lines[j].lstrip().startswith(b'#'):
+                continue
+            directive = DIRECTIVE_RE.match(lines[j])
+            if directive is None:
+                continue
+            keyword = directive.group(1)
+            if keyword in (b'if', b'ifdef', b'ifndef'):
+                depth += 1
+            elif keyword == b'endif':
+                if depth == 0:
+                    end_at = j
+                    break
+                depth -= 1
+            elif depth == 0 and keyword == b'elif':
+                break
+            elif depth == 0 and keyword == b'else' and else_at is None:
+                else_at = j
+
+        if end_at is None:
+            out.append(lines[i])
+            i += 1
+            continue
+
+        negated = match.group(1) == b'!' or match.group(2) == b'ifndef'
+        first = lines[i + 1:else_at if else_at is not None else end_at]
+        second = lines[else_at + 1:end_at] if else_at is not None else []
+
+        if negated:
+            kept = first
+            fired['Use non-SPEC function declarations'] = None
+        elif else_at is not None:
+            kept = second
+            fired['Use non-SPEC code blocks'] = None
+        else:
+            kept = []
+            fired['Remove SPEC-only code blocks'] = None
+
+        out.extend(_resolve_spec_conditionals(kept, fired))
+        i = end_at + 1
+
+    return out
+
+def strip_spec_conditionals(content, changes_made):
+    """Resolve SPEC #if/#ifdef blocks in a single pass over the lines of content."""
+    fired = {}
+    lines = _resolve_spec_conditionals(content.split(b'\n'), fired)
+    if not fired:
+        return content
+    changes_made.extend(fired)
+    return b'\n'.join(lines)
+
+# Patterns to identify and clean SPEC-specific code
+PATTERNS = {
+    # SPEC zobrist hash generation in ttable.cpp. These must stay ahead of
+    # spec_conditionals, which would otherwise resolve the same #if defined(SPEC)
+    # blocks itself and leave their lines and spacing behind instead of these
+    # exact rewrites.
+    'spec_zobrist_temp_var': {
+        'pattern': rb'#if defined\(SPEC\)\s*\n\s*BITBOARD temp;\s*\n#endif\s*\n',
+        'replacement': b'\n',
+        'description': 'Remove SPEC temp variable declaration',
+        'trigger': (b'initialize_zobrist', b'#if defined(SPEC)')
+    },
+
+    'spec_zobrist_assignment': {
+        'pattern': rb'#if defined\(SPEC\)\s*\n\s*temp = \(\(BITBOARD\)myrandom\(\)\) << 32;\s*\n\s*temp \+= \(BITBOARD\)myrandom\(\);\s*\n\s*zobrist\[p\]\[q\] = temp;\s*\n#else\s*\n\s*zobrist\[p\]\[q\] = \(\(\(BITBOARD\)myrandom\(\)\) << 32\) \+ \(BITBOARD\)myrandom\(\);\s*\n#endif',
+        'replacement': b'            zobrist[p][q] = (((BITBOARD)myrandom()) << 32) + (BITBOARD)myrandom();',
+        'description': 'Use non-SPEC zobrist hash generation',
+        'trigger': (b'initialize_zobrist', b'#if defined(SPEC)')
+    },
+
+    # Remove SPEC conditional compilation for const qualifiers
+    'const_conditional': {
+        'pattern': rb'#if !defined\(SPEC\)\s*\nconst\s*\n#endif\s*\n',
+        'replacement': b'const ',
+        'description': 'Restore const qualifiers',
+        'trigger': b'#if !defined(SPEC)'
+    },
+
+    # Remove SPEC version strings
+    'version_spec': {
+        'pattern': rb'#define VERSION "([^"]*)\s+SPEC"',
+        'replacement': rb'#define VERSION "\1"',
+        'description': 'Remove SPEC from version string',
+        'trigger': b'#define VERSION "'
+    },
+
+    # Remove SPEC package name modifications
+    'package_spec': {
+        'pattern': rb'#define PACKAGE "([^"]*)\s+SPEC"',
+        'replacement': rb'#define PACKAGE "\1"',
+        'description': 'Remove SPEC from package name',
+        'trigger': b'#define PACKAGE "'
+    },
+
+    # Resolve SPEC conditional blocks, keeping the non-SPEC branch
+    'spec_conditionals': {
+        'handler': strip_spec_conditionals,
+        'trigger': b'SPEC'
+    },
+
+    # Clean up SPEC comments
+    'spec_comments': {
+        'pattern': rb'/\*.*?SPEC.*?\*/',
+        'replacement': b'',
+        'description': 'Remove SPEC-related comments',
+        'trigger': b'SPEC'
+    },
+
+    # Remove SPEC configuration defines
+    'spec_defines': {
+        'pattern': rb'#define\s+.*SPEC.*\n',
+        'replacement': b'',
+        'description': 'Remove SPEC defines',
+        'trigger': b'SPEC'
+    },
+
+    # Remove SPEC memory configuration blocks
+    'spec_memory_config': {
+        'pattern': rb'#ifdef SMALL_MEMORY\s*\n.*?\n#elif BIG_MEMORY\s*\n.*?\n#else\s*\n#error Need to specify SMALL_MEMORY or BIG_MEMORY\.\s*\n#endif',
+        'replacement': b'TTSize = 15000000; // Default hash size',
+        'description': 'Replace SPEC memory configuration with default',
+        'trigger': b'#ifdef SMALL_MEMORY'
+    },
+
+    # Remove SPEC copyright protection blocks
+    'spec_copyprotection': {
+        'pattern': rb'#if !defined COPYPROTECTION\s*\n(.*?)\n#endif',
+        'replacement': rb'\1',
+        'description': 'Remove copy protection conditional compilation',
+        'trigger': b'#if !defined COPYPROTECTION'
+    },
+
+    # Remove SPEC commandline handling
+    'spec_commandline': {
+        'pattern': rb'/\* SPEC version: take EPD testset from commandline \*/\s*\n\s*if \(argc == 2\) \{\s*\n\s*run_epd_testsuite\(&gamestate, &state, argv\[1\]\);\s*\n\s*\} else \{\s*\n\s*myprintf\("Please specify the workfile\\n"\);\s*\n\s*return EXIT_FAILURE;\s*\n\s*\}',
+        'replacement': b'/* Normal UCI/XBoard interface would go here */',
+        'description': 'Remove SPEC-specific EPD testset command line handling',
+        'trigger': b'/* SPEC version: take EPD testset from commandline */'
+    },
+
+    # Remove SPEC MAX_CPU limitations
+    'spec_max_cpu': {
+        'literal': b'static pawntt_t PawnTT[MAX_CPU][1 << PAWN_HASH_LOG];',
+        'replacement': b'static pawntt_t PawnTT[1][1 << PAWN_HASH_LOG];',
+        'description': 'Remove multi-CPU SPEC limitations'
+    },
+
+    # Remove SPEC thread restrictions
+    'spec_thread_restrictions': {
+        'pattern': rb'int history_h\[MAX_CPU\]\[12\]\[64\];\s*\nint history_hit\[MAX_CPU\]\[12\]\[64\];\s*\nint history_tot\[MAX_CPU\]\[12\]\[64\];',
+        'replacement': b'int history_h[1][12][64];\nint history_hit[1][12][64];\nint history_tot[1][12][64];',
+        'description': 'Remove SPEC multi-threading restrictions',
+        'trigger': b'history_h[MAX_CPU]'
+    },
+
+    # Restore normal UCI mode behavior
+    'spec_uci_mode': {
+        'literal': b'uci_mode = FALSE;',
+        'replacement': b'uci_mode = TRUE;',
+        'description': 'Enable UCI mode by default'
+    },
+
+    # Remove SPEC-specific phase detection
+    'spec_phase_detection': {
+        'literal': b'/* quadratic scaling y = -0,0039x2 + 0,9954x + 13,2572 */',
+        'replacement': b'/* Standard king safety scaling */',
+        'description': 'Remove SPEC-specific evaluation scaling comment'
+    },
+
+    # Remove SPEC Windows detection
+    'spec_windows_detection': {
+        'literal': b'#if defined(WIN32) || defined(WIN64) || defined(SPEC_WINDOWS)',
+        'replacement': b'#if defined(WIN32) || defined(WIN64)',
+        'description': 'Remove SPEC_WINDOWS detection'
+    },
+
+    # Remove this pattern entirely - it's causing issues
+    # 'spec_threadid_references': {
+    #     'pattern': rb's->threadid',
+    #     'replacement': b'0',
+    #     'description': 'Replace SPEC threadid with single thread'
+    # },
+
+    # Pattern for any remaining MAX_CPU arrays
+    'spec_max_cpu_arrays': {
+        'literal': b'[MAX_CPU]',
+        'replacement': b'[1]',
+        'description': 'Replace MAX_CPU array dimensions with single element'
+    },
+
+    # Pattern for SPEC benchmark identification
+    'spec_benchmark_comments': {
+        'pattern': rb'/\*.*SPEC.*benchmark.*\*/',
+        'replacement': b'',
+        'description': 'Remove SPEC benchmark identification comments',
+        'trigger': b'benchmark'
+    },
+
+    # Remove SPEC-specific CPU count defines
+    'spec_cpu_defines': {
+        'pattern': rb'#define\s+MAX_CPU\s+\d+',
+        'replacement': b'#define MAX_CPU 1',
+        'description': 'Set MAX_CPU to 1',
+        'trigger': b'MAX_CPU'
+    },
+
+    # Remove SPEC memory size defines
+    'spec_memory_defines': {
+        'pattern': rb'#define\s+(SMALL_MEMORY|BIG_MEMORY)\s*',
+        'replacement': b'',
+        'description': 'Remove SPEC memory size defines',
+        'trigger': b'_MEMORY'
+    },
+
+    # Remove SPEC performance measurement code
+    'spec_performance_code': {
+        'pattern': rb'/\*\s*SPEC:\s*.*?\*/',
+        'replacement': b'',
+        'description': 'Remove SPEC performance measurement comments',
+        'trigger': b'SPEC:'
+    },
+
+    # Remove SPEC test environment setup
+    'spec_test_env': {
+        'pattern': rb'/\*\s*SPEC\s+version:.*?\*/',
+        'replacement': b'',
+        'description': 'Remove SPEC test environment comments',
+        'trigger': b'version:'
+    }
+}
+
+# Additional cleanups for restored functionality
+RESTORATIONS = {
+    # Restore typical chess engine features that SPEC might have disabled
+    'enable_pondering': {
+        'pattern': rb'int allow_pondering\s*=\s*FALSE;',
+        'replacement': b'int allow_pondering = TRUE;',
+        'description': 'Ensure pondering is enabled',
+        'trigger': b'int allow_pondering'
+    },
+
+    'enable_logging': {
+        'pattern': rb'int cfg_logging\s*=\s*0;',
+        'replacement': b'int cfg_logging = 1;',
+        'description': 'Re-enable logging',
+        'trigger': b'int cfg_logging'
+    },
+
+    # Restore dynamic behavior
+    'restore_randomization': {
+        'literal': b'/* SPEC: randomization disabled */',
+        'replacement': b'',
+        'description': 'Remove randomization disable comments'
+    },
+
+    # Restore normal chess engine main function
+    'restore_main_function': {
+        'literal': b'mysrand(12345);',
+        'replacement': b'mysrand((unsigned int)time(NULL));',
+        'description': 'Use proper random seed instead of fixed SPEC seed'
+    },
+
+    # Restore normal time controls
+    'restore_time_controls': {
+        'literal': b'gamestate.time_left = 15 * 60 * 100;',
+        'replacement': b'gamestate.time_left = 300 * 100; // 5 minutes default',
+        'description': 'Set reasonable default time control'
+    },
+
+    # Remove SPEC hardcoded seeds - more specific
+    'remove_hardcoded_seeds_31657': {
+        'literal': b'mysrand(31657);',
+        'replacement': b'mysrand((unsigned int)time(NULL));',
+        'description': 'Use time-based random seed instead of hardcoded 31657'
+    },
+
+    # Restore time functions
+    'restore_time_functions': {
+        'pattern': rb'int rtime\( void \)\s*\{\s*\n\s*return 0;\s*\n\}',
+        'replacement': b'''int rtime(void) {
 #ifdef WIN32
     return GetTickCount();
 #else
@@ -278,20 +347,22 @@ class SpecCodeCleaner:
     return tv.tv_sec * 100 + tv.tv_usec / 10000;
 #endif
 }''',
-                'description': 'Restore actual time function implementation'
-            },
-
-            # Restore rdifftime function
-            'restore_rdifftime_function': {
-                'pattern': r'int rdifftime\(int end, int start\) \{\s*\n\s*return 0;\s*\n\}',
-                'replacement': 'int rdifftime(int end, int start) {\n    return end - start;\n}',
-                'description': 'Restore actual time difference function'
-            },
-
-            # Restore interrupt function
-            'restore_interrupt_function': {
-                'pattern': r'int interrupt\(void\) \{\s*\n\s*return 0;\s*\n\}',
-                'replacement': '''int interrupt(void) {
+        'description': 'Restore actual time function implementation',
+        'trigger': b'int rtime( void )'
+    },
+
+    # Restore rdifftime function
+    'restore_rdifftime_function': {
+        'pattern': rb'int rdifftime\(int end, int start\) \{\s*\n\s*return 0;\s*\n\}',
+        'replacement': b'int rdifftime(int end, int start) {\n    return end - start;\n}',
+        'description': 'Restore actual time difference function',
+        'trigger': b'int rdifftime(int end, int start) {'
+    },
+
+    # Restore interrupt function
+    'restore_interrupt_function': {
+        'pattern': rb'int interrupt\(void\) \{\s*\n\s*return 0;\s*\n\}',
+        'replacement': b'''int interrupt(void) {
 #ifdef WIN32
     return _kbhit();
 #else
@@ -304,13 +375,14 @@ class SpecCodeCleaner:
     return select(1, &readfds, NULL, NULL, &tv) > 0;
 #endif
 }''',
-                'description': 'Restore actual interrupt detection'
-            },
-
-            # Add necessary includes
-            'add_time_includes': {
-                'pattern': r'#include "config\.h"\n#include "sjeng\.h"',
-                'replacement': '''#include "config.h"
+        'description': 'Restore actual interrupt detection',
+        'trigger': b'int interrupt(void) {'
+    },
+
+    # Add necessary includes
+    'add_time_includes': {
+        'pattern': rb'#include "config\.h"\n#include "sjeng\.h"',
+        'replacement': b'''#include "config.h"
 #include "sjeng.h"
 #ifdef WIN32
 #include <windows.h>
@@ -321,13 +393,14 @@ class SpecCodeCleaner:
 #include <unistd.h>
 #endif
 #include <time.h>''',
-                'description': 'Add necessary time and system includes'
-            },
-
-            # Restore UCI interface
-            'restore_uci_interface': {
-                'pattern': r'/\* Normal UCI/XBoard interface would go here \*/',
-                'replacement': '''/* UCI/XBoard interface */
+        'description': 'Add necessary time and system includes',
+        'trigger': b'#include "sjeng.h"'
+    },
+
+    # Restore UCI interface
+    'restore_uci_interface': {
+        'pattern': rb'/\* Normal UCI/XBoard interface would go here \*/',
+        'replacement': b'''/* UCI/XBoard interface */
     if (argc > 1 && strcmp(argv[1], "uci") == 0) {
         uci_mode = TRUE;
     }
@@ -335,58 +408,45 @@ class SpecCodeCleaner:
     // Main game loop would go here
     // This would include UCI command parsing, game play, etc.
     myprintf("Sjeng chess engine ready\\n");''',
-                'description': 'Add basic UCI interface structure'
-            },
-
-            # Enable pondering by default
-            'enable_pondering_default': {
-                'pattern': r'allow_pondering = TRUE;',
-                'replacement': 'allow_pondering = TRUE;',
-                'description': 'Ensure pondering is enabled by default'
-            },
-
-            # Restore normal hash table sizing
-            'restore_hash_sizing': {
-                'pattern': r'TTSize = 1;',
-                'replacement': 'TTSize = 15000000; // 15MB default hash size',
-                'description': 'Restore reasonable hash table size'
-            },
-
-            # Fix SPEC-disabled features
-            'restore_book_usage': {
-                'pattern': r'use_book = FALSE;',
-                'replacement': 'use_book = TRUE;',
-                'description': 'Re-enable opening book usage'
-            },
-
-            # Restore normal evaluation
-            'restore_eval_features': {
-                'pattern': r'/\* SPEC: evaluation simplified \*/',
-                'replacement': '',
-                'description': 'Remove evaluation simplification comments'
-            },
-
-            # Fix thread safety
-            'restore_thread_safety': {
-                'pattern': r'PawnTT\[0\]',
-                'replacement': 'PawnTT[0]',
-                'description': 'Ensure correct pawn table indexing'
-            },
-
-            # Restore search features
-            'restore_search_features': {
-                'pattern': r'/\* SPEC: search features disabled \*/',
-                'replacement': '',
-                'description': 'Remove search feature disable comments'
-            }
-        }
-
-        # Additional fixes for broken function structures
-        self.structure_fixes = {
-            # Handle specific ttable.cpp SPEC patterns more carefully
-            'fix_ttable_patterns': {
-                'pattern': r'int p, q;\s*\n\s*\}\s*\n\s*s->hash = \(CONST64U\(0xDEADBEEF\) << 32\) \+ CONST64U\(0xDEADBEEF\);\s*\n\s*s->pawnhash = \(CONST64U\(0xC0FFEE00\) << 32\) \+ CONST64U\(0xC0FFEE00\);\s*\n\}',
-                'replacement': '''void initialize_hash(state_t *s) {
+        'description': 'Add basic UCI interface structure',
+        'trigger': b'/* Normal UCI/XBoard interface would go here */'
+    },
+
+    # Restore normal hash table sizing
+    'restore_hash_sizing': {
+        'literal': b'TTSize = 1;',
+        'replacement': b'TTSize = 15000000; // 15MB default hash size',
+        'description': 'Restore reasonable hash table size'
+    },
+
+    # Fix SPEC-disabled features
+    'restore_book_usage': {
+        'literal': b'use_book = FALSE;',
+        'replacement': b'use_book = TRUE;',
+        'description': 'Re-enable opening book usage'
+    },
+
+    # Restore normal evaluation
+    'restore_eval_features': {
+        'literal': b'/* SPEC: evaluation simplified */',
+        'replacement': b'',
+        'description': 'Remove evaluation simplification comments'
+    },
+
+    # Restore search features
+    'restore_search_features': {
+        'literal': b'/* SPEC: search features disabled */',
+        'replacement': b'',
+        'description': 'Remove search feature disable comments'
+    }
+}
+
+# Additional fixes for broken function structures
+STRUCTURE_FIXES = {
+    # Handle specific ttable.cpp SPEC patterns more carefully
+    'fix_ttable_patterns': {
+        'pattern': rb'int p, q;\s*\n\s*\}\s*\n\s*s->hash = \(CONST64U\(0xDEADBEEF\) << 32\) \+ CONST64U\(0xDEADBEEF\);\s*\n\s*s->pawnhash = \(CONST64U\(0xC0FFEE00\) << 32\) \+ CONST64U\(0xC0FFEE00\);\s*\n\}',
+        'replacement': b'''void initialize_hash(state_t *s) {
     int p, q = 0;
 
     for (p = 0; p < 14; p++) {
@@ -398,138 +458,217 @@ class SpecCodeCleaner:
     s->hash = (CONST64U(0xDEADBEEF) << 32) + CONST64U(0xDEADBEEF);
     s->pawnhash = (CONST64U(0xC0FFEE00) << 32) + CONST64U(0xC0FFEE00);
 }''',
-                'description': 'Fix broken hash initialization function'
-            }
-        }
+        'description': 'Fix broken hash initialization function',
+        'trigger': b'CONST64U(0xDEADBEEF)'
+    }
+}
+
+# Pre-compile every pattern once at import so clean_file_content can call .sub()
+# directly. Each entry's 'trigger' is a literal every match must contain; when it
+# is absent from a file the regex is skipped entirely (a tuple trigger needs all
+# of its literals). Entries with a 'literal'
+# instead of a 'pattern' are plain byte replacements and never touch the regex engine.
+for pattern_info in PATTERNS.values():
+    if 'pattern' not in pattern_info:
+        continue
+    pattern_info['regex'] = re.compile(pattern_info['pattern'], re.MULTILINE)
+
+for pattern_info in RESTORATIONS.values():
+    if 'pattern' not in pattern_info:
+        continue
+    pattern_info['regex'] = re.compile(pattern_info['pattern'], re.MULTILINE | re.DOTALL)
+
+for pattern_info in STRUCTURE_FIXES.values():
+    if 'pattern' not in pattern_info:
+        continue
+    pattern_info['regex'] = re.compile(pattern_info['pattern'], re.MULTILINE | re.DOTALL)
+
+# Runs of independent constant-replacement rules that are applied back to
+# back are fused into one alternation, so each run scans the file only once.
+# Members must not overlap or feed each other, so the result matches applying
+# them one by one; patterns with backreferences stay separate.
+FUSED_RULE_GROUPS = [
+    (PATTERNS, ['spec_benchmark_comments', 'spec_cpu_defines', 'spec_memory_defines',
+                'spec_performance_code']),
+    (RESTORATIONS, ['enable_pondering', 'enable_logging']),
+    (RESTORATIONS, ['restore_time_functions', 'restore_rdifftime_function',
+                    'restore_interrupt_function', 'add_time_includes']),
+]
+
+FUSED_GROUPS = {}
+for table, names in FUSED_RULE_GROUPS:
+    rules = {name: table[name] for name in names}
+    group = {
+        'names': names,
+        'rules': rules,
+        'regex': re.compile(
+            b'|'.join(b'(?P<%s>%s)' % (name.encode(), rules[name]['pattern']) for name in names),
+            rules[names[0]]['regex'].flags
+        ),
+        'triggers': tuple(rules[name]['trigger'] for name in names)
+    }
+    for name in names:
+        FUSED_GROUPS[name] = group
+
+def replace_threadid_assignment(match):
+    """Comment out a threadid assignment matched by THREADID_ASSIGNMENT_RE."""
+    if match.group(0) == THREADID_ZERO:
+        return THREADID_ZERO_COMMENT
+    return b'/* threadid assignment removed */'
+
+def read_source(path):
+    """Read a source file as bytes with the universal-newline translation of text mode.
+
+    "\r\n" and lone "\r" become "\n", as the text-mode reads this replaced did,
+    so CRLF sources are matched and split exactly like LF ones.
+    """
+    with open(path, 'rb') as f:
+        content = f.read()
+    if b'\r' in content:
+        content = content.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+    return content
+
+class SpecCodeCleaner:
+    def __init__(self):
+        # The rule tables are compiled once at import and shared by every instance
+        self.patterns = PATTERNS
+        self.restorations = RESTORATIONS
+        self.structure_fixes = STRUCTURE_FIXES
+        self.fused_groups = FUSED_GROUPS
+
+    def apply_fused_group(self, group, content, changes_made):
+        """Apply a fused group of rules in a single pass over the content."""
+        if not any(trigger in content for trigger in group['triggers']):
+            return content
+
+        matched = set()
+
+        def replace(match):
+            matched.add(match.lastgroup)
+            return group['rules'][match.lastgroup]['replacement']
+
+        content = group['regex'].sub(replace, content)
+
+        for name in group['names']:
+            if name in matched:
+                changes_made.append(group['rules'][name]['description'])
+
+        return content
+
+    def apply_rules(self, rules, content, changes_made):
+        """Apply a table of rules in order, running fused groups as one pass."""
+        for name, rule in rules.items():
+            # Fused rules run together when the first member of their group is reached
+            fused_group = self.fused_groups.get(name)
+            if fused_group is not None:
+                if name == fused_group['names'][0]:
+                    content = self.apply_fused_group(fused_group, content, changes_made)
+                continue
+
+            content = self.apply_rule(rule, content, changes_made)
+
+        return content
+
+    def apply_rule(self, rule, content, changes_made):
+        """Apply a single literal or regex rule, recording its description if it changed anything."""
+        if 'literal' in rule:
+            if rule['literal'] in content:
+                content = content.replace(rule['literal'], rule['replacement'])
+                changes_made.append(rule['description'])
+            return content
+
+        # A tuple trigger requires every one of its literals to be present
+        trigger = rule['trigger']
+        if isinstance(trigger, tuple):
+            if not all(part in content for part in trigger):
+                return content
+        elif trigger not in content:
+            return content
+
+        # Handlers rewrite the content themselves and record their own changes
+        if 'handler' in rule:
+            return rule['handler'](content, changes_made)
+
+        content, count = rule['regex'].subn(rule['replacement'], content)
+
+        if count:
+            changes_made.append(rule['description'])
+
+        return content
 
     def clean_file_content(self, content):
-        """Clean SPEC-specific code from file content."""
+        """Clean SPEC-specific code from raw (bytes) file content."""
         original_content = content
         changes_made = []
 
         # Handle the specific EPD workload message replacement carefully
         # This is done first to avoid regex corruption
-        if 'myprintf("Workload not found' in content:
-            content = content.replace('myprintf("Workload not found\\n");', 'myprintf("Test file not found\\n");')
-            content = content.replace('myprintf("Workload not found\n");', 'myprintf("Test file not found\n");')
+        if b'myprintf("Workload not found' in content:
+            content = content.replace(b'myprintf("Workload not found\\n");', b'myprintf("Test file not found\\n");')
+            content = content.replace(b'myprintf("Workload not found\n");', b'myprintf("Test file not found\n");')
             changes_made.append('Fix workload message')
 
-        # Special handling for ttable.cpp zobrist function
-        if 'initialize_zobrist' in content and '#if defined(SPEC)' in content:
-            # More conservative approach - just clean the SPEC blocks without breaking structure
-            content = re.sub(
-                r'#if defined\(SPEC\)\s*\n\s*BITBOARD temp;\s*\n#endif\s*\n',
-                '\n',
-                content,
-                flags=re.MULTILINE
-            )
-            content = re.sub(
-                r'#if defined\(SPEC\)\s*\n\s*temp = \(\(BITBOARD\)myrandom\(\)\) << 32;\s*\n\s*temp \+= \(BITBOARD\)myrandom\(\);\s*\n\s*zobrist\[p\]\[q\] = temp;\s*\n#else\s*\n\s*zobrist\[p\]\[q\] = \(\(\(BITBOARD\)myrandom\(\)\) << 32\) \+ \(BITBOARD\)myrandom\(\);\s*\n#endif',
-                '            zobrist[p][q] = (((BITBOARD)myrandom()) << 32) + (BITBOARD)myrandom();',
-                content,
-                flags=re.MULTILINE
-            )
-            changes_made.append('Clean SPEC zobrist patterns')
-
         # Apply structure fixes for any broken functions (but only if needed)
-        for pattern_name, pattern_info in self.structure_fixes.items():
-            old_content = content
-            content = re.sub(
-                pattern_info['pattern'],
-                pattern_info['replacement'],
-                content,
-                flags=re.MULTILINE | re.DOTALL
-            )
-
-            if content != old_content:
-                changes_made.append(pattern_info['description'])
+        content = self.apply_rules(self.structure_fixes, content, changes_made)
 
-        # Apply main cleaning patterns (excluding problematic ones)
-        for pattern_name, pattern_info in self.patterns.items():
-            # Skip patterns that might interfere with function structures or cause variable corruption
-            if pattern_name in ['epd_testsuite_function', 'spec_zobrist_temp_var', 'spec_zobrist_assignment']:
-                continue
-
-            old_content = content
-
-            if pattern_name in ['spec_function_decl', 'spec_ifdef_block', 'spec_time_measurement']:
-                # Multi-line patterns with groups
-                content = re.sub(
-                    pattern_info['pattern'],
-                    pattern_info['replacement'],
-                    content,
-                    flags=re.MULTILINE | re.DOTALL
-                )
-            else:
-                # Single-line or simple patterns
-                content = re.sub(
-                    pattern_info['pattern'],
-                    pattern_info['replacement'],
-                    content,
-                    flags=re.MULTILINE
-                )
-
-            if content != old_content:
-                changes_made.append(pattern_info['description'])
+        # Apply main cleaning patterns
+        content = self.apply_rules(self.patterns, content, changes_made)
 
         # Apply threadid replacement very carefully - replace the entire assignment
-        if 's->threadid' in content:
-            old_content = content
-            # Replace the entire assignment statements that set threadid to 0
-            content = content.replace('s->threadid = 0;', '/* s->threadid = 0; // Removed for single-thread operation */')
-            # Also handle any other threadid assignments
-            content = re.sub(r's->threadid\s*=\s*[^;]+;', '/* threadid assignment removed */', content)
-            if content != old_content:
+        if b's->threadid' in content:
+            literal_count = content.count(THREADID_ZERO)
+            if content.count(b's->threadid') == literal_count:
+                # Only the plain "s->threadid = 0;" form is present, no regex needed
+                content = content.replace(THREADID_ZERO, THREADID_ZERO_COMMENT)
+                count = literal_count
+            else:
+                # Replace every assignment in one pass; the callback keeps the plain
+                # form's comment so its text is not matched again by the regex
+                content, count = THREADID_ASSIGNMENT_RE.subn(replace_threadid_assignment, content)
+            if count:
                 changes_made.append('Replace SPEC threadid assignments with comments')
 
         # Apply restorations and add necessary includes
-        for pattern_name, pattern_info in self.restorations.items():
-            old_content = content
-            content = re.sub(
-                pattern_info['pattern'],
-                pattern_info['replacement'],
-                content,
-                flags=re.MULTILINE | re.DOTALL
-            )
-
-            if content != old_content:
-                changes_made.append(pattern_info['description'])
+        content = self.apply_rules(self.restorations, content, changes_made)
 
         # Add time.h include if we're using time() function and it's not already included
-        if 'time(NULL)' in content and '#include <time.h>' not in content and '#include "time.h"' not in content:
-            # Find the last #include and add time.h after it
-            include_pattern = r'(#include\s+[<"][^>"]+[>"])'
-            includes = re.findall(include_pattern, content)
-            if includes:
-                last_include = includes[-1]
-                content = content.replace(last_include, last_include + '\n#include <time.h>')
+        if b'time(NULL)' in content and b'#include <time.h>' not in content and b'#include "time.h"' not in content:
+            # Find the last #include and add time.h at the end of its line
+            last_include = content.rfind(b'#include')
+            if last_include != -1:
+                line_end = content.find(b'\n', last_include)
+                if line_end == -1:
+                    line_end = len(content)
+                content = content[:line_end] + b'\n#include <time.h>' + content[line_end:]
                 changes_made.append('Add time.h include for time() function')
 
         # Additional cleanup: remove extra blank lines
-        content = re.sub(r'\n\s*\n\s*\n', '\n\n', content)
+        content = EXTRA_BLANK_LINES_RE.sub(b'\n\n', content)
 
         # Fix spacing around restored const keywords
-        content = re.sub(r'const\s+(\w)', r'const \1', content)
+        if b'const' in content:
+            content = CONST_SPACING_RE.sub(rb'const \1', content)
 
         return content, changes_made
 
     def should_process_file(self, filepath):
         """Check if file should be processed based on extension."""
         extensions = {'.c', '.h', '.cpp', '.hpp', '.cc', '.cxx'}
-        return filepath.suffix.lower() in extensions
+        return os.path.splitext(filepath)[1].lower() in extensions
 
     def process_file(self, input_path, output_path):
         """Process a single file."""
         try:
-            with open(input_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
+            # Work on raw bytes: the sources are ASCII C/C++, so skipping the
+            # UTF-8 decode/encode round trip changes nothing but the cost
+            content = read_source(input_path)
 
             cleaned_content, changes = self.clean_file_content(content)
 
             # Create output directory if it doesn't exist
             output_path.parent.mkdir(parents=True, exist_ok=True)
 
-            with open(output_path, 'w', encoding='utf-8') as f:
+            with open(output_path, 'wb') as f:
                 f.write(cleaned_content)
 
             return changes
@@ -538,8 +677,42 @@ class SpecCodeCleaner:
             print(f"Error processing {input_path}: {e}")
             return []
 
-    def process_directory(self, input_dir, output_dir):
-        """Process all files in a directory recursively."""
+    def is_up_to_date(self, input_path, output_path):
+        """Check whether output_path was written after input_path last changed.
+
+        input_path may be a Path or an os.DirEntry, whose stat() is cached.
+        """
+        try:
+            return output_path.stat().st_mtime_ns >= input_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return False
+
+    def is_copy_current(self, input_path, output_path):
+        """Check whether output_path already holds a copy of input_path.
+
+        copy2 preserves the modification time, so an unchanged copy has the
+        same size and an mtime no older than the input's.
+        """
+        try:
+            output_stat = output_path.stat()
+        except FileNotFoundError:
+            return False
+        input_stat = input_path.stat()
+        return (output_stat.st_size == input_stat.st_size
+                and output_stat.st_mtime_ns >= input_stat.st_mtime_ns)
+
+    def process_directory(self, input_dir, output_dir, max_workers=None, force=False):
+        """Process all files in a directory recursively.
+
+        Source files are cleaned in parallel using up to max_workers
+        processes (default: one per CPU). Source files whose output is
+        already newer than the input, and non-source files that were
+        already copied, are skipped unless force is set.
+
+        Returns (total_files, processed_files, total_changes, up_to_date_files),
+        where up_to_date_files counts the source files skipped that way; they
+        are not re-read, so they are not part of processed_files.
+        """
         input_path = Path(input_dir)
         output_path = Path(output_dir)
 
@@ -548,34 +721,67 @@ class SpecCodeCleaner:
 
         total_files = 0
         processed_files = 0
+        up_to_date_files = 0
         total_changes = []
+        source_files = []
 
-        for file_path in input_path.rglob('*'):
-            if file_path.is_file():
-                total_files += 1
+        for entry in iter_files(input_path):
+            total_files += 1
 
-                if self.should_process_file(file_path):
-                    # Calculate relative path and output location
-                    relative_path = file_path.relative_to(input_path)
-                    output_file = output_path / relative_path
+            # Calculate relative path and output location
+            relative_path = os.path.relpath(entry.path, input_path)
+            output_file = output_path / relative_path
 
-                    print(f"Processing: {relative_path}")
-                    changes = self.process_file(file_path, output_file)
+            if self.should_process_file(entry.name):
+                # Skip files already cleaned since the input last changed
+                if not force and self.is_up_to_date(entry, output_file):
+                    print(f"Up to date: {relative_path}")
+                    up_to_date_files += 1
+                    continue
 
-                    if changes:
-                        processed_files += 1
-                        total_changes.extend(changes)
-                        print(f"  Changes: {', '.join(changes)}")
-                    else:
-                        print(f"  No SPEC code found")
+                source_files.append((relative_path, entry.path, output_file))
+            else:
+                # Copy non-source files as-is (except Makefile since user has their own),
+                # unless an identical copy from an earlier run is already there
+                if entry.name.lower() != 'makefile':
+                    if not force and self.is_copy_current(entry, output_file):
+                        continue
+                    output_file.parent.mkdir(parents=True, exist_ok=True)
+                    shutil.copy2(entry.path, output_file)
+
+        # Files are independent, so clean them across worker processes; map()
+        # keeps results in walk order for the report below
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as executor:
+            results = executor.map(
+                _process_file_worker,
+                [(file_path, output_file) for _, file_path, output_file in source_files],
+                chunksize=16
+            )
+
+            for (relative_path, _, _), changes in zip(source_files, results):
+                print(f"Processing: {relative_path}")
+
+                if changes:
+                    processed_files += 1
+                    # Results are unpickled from the workers as fresh strings; intern
+                    # them so repeated descriptions share one object in the summary
+                    total_changes.extend(map(sys.intern, changes))
+                    print(f"  Changes: {', '.join(changes)}")
                 else:
-                    # Copy non-source files as-is (except Makefile since user has their own)
-                    if file_path.name.lower() != 'makefile':
-                        output_file = output_path / file_path.relative_to(input_path)
-                        output_file.parent.mkdir(parents=True, exist_ok=True)
-                        shutil.copy2(file_path, output_file)
+                    print(f"  No SPEC code found")
+
+        return total_files, processed_files, total_changes, up_to_date_files
+
+# Per-process cleaner used by process_directory's worker pool
+_worker_cleaner = None
+
+def _init_worker():
+    global _worker_cleaner
+    _worker_cleaner = SpecCodeCleaner()
 
-        return total_files, processed_files, total_changes
+def _process_file_worker(paths):
+    input_file, output_file = paths
+    return _worker_cleaner.process_file(input_file, output_file)
 
 def main():
     parser = argparse.ArgumentParser(
@@ -600,6 +806,10 @@ Examples:
                        help='Verbose output')
     parser.add_argument('--dry-run', action='store_true',
                        help='Show what would be changed without modifying files')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                       help='Number of worker processes for directories (default: CPU count)')
+    parser.add_argument('--force', action='store_true',
+                       help='Re-clean and re-copy files even if their output is up to date')
 
     args = parser.parse_args()
 
@@ -611,8 +821,7 @@ Examples:
         if input_path.is_file():
             # Process single file
             if args.dry_run:
-                with open(input_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
+                content = read_source(input_path)
                 _, changes = cleaner.clean_file_content(content)
                 print(f"Would apply changes to {input_path}:")
                 for change in changes:
@@ -632,30 +841,29 @@ Examples:
             if args.dry_run:
                 print("DRY RUN - No files will be modified")
                 # Implement dry run for directory
-                for file_path in input_path.rglob('*'):
-                    if file_path.is_file() and cleaner.should_process_file(file_path):
-                        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            content = f.read()
+                for entry in iter_files(input_path):
+                    if cleaner.should_process_file(entry.name):
+                        content = read_source(entry.path)
                         _, changes = cleaner.clean_file_content(content)
                         if changes:
-                            print(f"\nWould modify {file_path.relative_to(input_path)}:")
+                            print(f"\nWould modify {os.path.relpath(entry.path, input_path)}:")
                             for change in changes:
                                 print(f"  - {change}")
             else:
-                total_files, processed_files, all_changes = cleaner.process_directory(
-                    input_path, output_path
+                total_files, processed_files, all_changes, up_to_date_files = cleaner.process_directory(
+                    input_path, output_path, max_workers=args.jobs, force=args.force
                 )
 
                 print(f"\nSummary:")
                 print(f"  Total files: {total_files}")
                 print(f"  Files with SPEC code: {processed_files}")
+                if up_to_date_files:
+                    print(f"  Source files already up to date (not re-checked): {up_to_date_files}")
                 print(f"  Total changes made: {len(all_changes)}")
 
                 if args.verbose and all_changes:
                     print(f"\nAll changes applied:")
-                    change_counts = {}
-                    for change in all_changes:
-                        change_counts[change] = change_counts.get(change, 0) + 1
+                    change_counts = Counter(all_changes)
 
                     for change, count in sorted(change_counts.items()):
                         print(f"  {change}: {count} times")
@@ -16,42 +16,99 @@ import sys
 import argparse
 from pathlib import Path
 import shutil
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# The directory walker shared by the cleaners lives in libs/, one level up
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from source_tree import iter_files
+
+def read_source(path):
+    """Read a source file as bytes with the universal-newline translation of text mode.
+
+    "\r\n" and lone "\r" become "\n", as the text-mode reads this replaced did;
+    every replacement key spells its line breaks as "\n", so CRLF sources
+    would otherwise match none of them.
+    """
+    with open(path, 'rb') as f:
+        content = f.read()
+    if b'\r' in content:
+        content = content.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+    return content
+
+def _fuse_replacements(triggers, replacements):
+    """Compile literal (old, new) pairs into one regex and a lookup table."""
+    regex = re.compile(b'|'.join(re.escape(old) for old, _ in replacements))
+    return triggers, regex, dict(replacements)
 
 class LBMSpecCodeCleaner:
-    def __init__(self):
-        pass
-
-    def clean_main_h(self, content):
-        """Clean main.h"""
+    # Each file's literal (old, new) replacements are fused into a single
+    # alternation once at import, so a file is scanned once instead of once
+    # per replace. Alternatives are tried in order, so a longer old string
+    # must come before any shorter one it contains. The first argument lists
+    # literals of which every old string contains at least one; a file with
+    # none of them skips the regex pass entirely.
+    _REPLACEMENTS_MAIN_H = _fuse_replacements((b'SPEC',), (
         # Remove SPEC conditionals around timing includes
-        content = content.replace('#if !defined(SPEC)\n#include <sys/times.h>\n#endif', '#include <sys/times.h>')
+        (b'#if !defined(SPEC)\n#include <sys/times.h>\n#endif',
+         b'#include <sys/times.h>'),
 
         # Remove SPEC conditionals around timing struct
-        content = content.replace('#if !defined(SPEC)\ntypedef struct {\n\tdouble timeScale;\n\tclock_t tickStart, tickStop;\n\tstruct tms timeStart, timeStop;\n\n} MAIN_Time;\n#endif',
-                                 'typedef struct {\n\tdouble timeScale;\n\tclock_t tickStart, tickStop;\n\tstruct tms timeStart, timeStop;\n} MAIN_Time;')
+        (b'#if !defined(SPEC)\ntypedef struct {\n\tdouble timeScale;\n\tclock_t tickStart, tickStop;\n\tstruct tms timeStart, timeStop;\n\n} MAIN_Time;\n#endif',
+         b'typedef struct {\n\tdouble timeScale;\n\tclock_t tickStart, tickStop;\n\tstruct tms timeStart, timeStop;\n} MAIN_Time;'),
 
         # Remove SPEC conditionals around function declarations
-        content = content.replace('#if !defined(SPEC)\nvoid MAIN_startClock( MAIN_Time* time );\nvoid MAIN_stopClock( MAIN_Time* time, const MAIN_Param* param );\n#endif',
-                                 'void MAIN_startClock( MAIN_Time* time );\nvoid MAIN_stopClock( MAIN_Time* time, const MAIN_Param* param );')
-
-        return content
+        (b'#if !defined(SPEC)\nvoid MAIN_startClock( MAIN_Time* time );\nvoid MAIN_stopClock( MAIN_Time* time, const MAIN_Param* param );\n#endif',
+         b'void MAIN_startClock( MAIN_Time* time );\nvoid MAIN_stopClock( MAIN_Time* time, const MAIN_Param* param );'),
+    ))
 
-    def clean_main_c(self, content):
-        """Clean main.c"""
+    _REPLACEMENTS_MAIN_C = _fuse_replacements((b'SPEC',), (
         # Fix includes
-        content = content.replace('#if defined(SPEC)\n#   include <time.h>\n#else\n#   include <sys/times.h>\n#   include <unistd.h>\n#endif',
-                                 '#include <sys/times.h>\n#include <unistd.h>')
+        (b'#if defined(SPEC)\n#   include <time.h>\n#else\n#   include <sys/times.h>\n#   include <unistd.h>\n#endif',
+         b'#include <sys/times.h>\n#include <unistd.h>'),
 
         # Remove SPEC conditionals around timing variable
-        content = content.replace('#if !defined(SPEC)\n\tMAIN_Time time;\n#endif', '\tMAIN_Time time;')
+        (b'#if !defined(SPEC)\n\tMAIN_Time time;\n#endif',
+         b'\tMAIN_Time time;'),
 
         # Remove SPEC conditionals around timing calls
-        content = content.replace('#if !defined(SPEC)\n\tMAIN_startClock( &time );\n#endif', '\tMAIN_startClock( &time );')
-        content = content.replace('#if !defined(SPEC)\n\tMAIN_stopClock( &time, &param );\n#endif', '\tMAIN_stopClock( &time, &param );')
+        (b'#if !defined(SPEC)\n\tMAIN_startClock( &time );\n#endif',
+         b'\tMAIN_startClock( &time );'),
+        (b'#if !defined(SPEC)\n\tMAIN_stopClock( &time, &param );\n#endif',
+         b'\tMAIN_stopClock( &time, &param );'),
+    ))
 
-        # Ensure timing functions are always included
-        if 'void MAIN_stopClock( MAIN_Time* time, const MAIN_Param* param ) {' not in content:
-            timing_code = '''
+    _REPLACEMENTS_LBM_C = _fuse_replacements((b'SPEC', b'%lf'), (
+        # Fix OpenMP conditionals
+        (b'(defined(_OPENMP) || defined(SPEC_OPENMP)) && !defined(SPEC_SUPPRESS_OPENMP) && !defined(SPEC_AUTO_SUPPRESS_OPENMP)',
+         b'defined(_OPENMP)'),
+
+        # Fix memory allocation message
+        (b'#ifndef SPEC\n\tprintf( "LBM_allocateGrid: allocated %.1f MByte\\n",\n\t        size / (1024.0*1024.0) );\n#endif',
+         b'\tprintf( "LBM_allocateGrid: allocated %.1f MByte\\n",\n\t        size / (1024.0*1024.0) );'),
+
+        # Fix variable types in endianness handling
+        (b'#if !defined(SPEC)\n\t\tint i;\n#else\n               size_t i;\n#endif',
+         b'\t\tint i;'),
+        (b'#if !defined(SPEC)\n\t\t\tint i;\n\t\t#else\n\t\t               size_t i;\n\t\t#endif',
+         b'\t\t\tint i;'),
+
+        # Fix precision handling in scanf
+        (b'#if !defined(SPEC)\n\t\t\t\tif( sizeof( OUTPUT_PRECISION ) == sizeof( double )) {\n\t\t\t\t\tfscanf( file, "%lf %lf %lf\\n", &fileUx, &fileUy, &fileUz );\n\t\t\t\t}\n\t\t\t\telse {\n#endif\n\t\t\t\t\tfscanf( file, "%f %f %f\\n", &fileUx, &fileUy, &fileUz );\n#if !defined(SPEC)\n\t\t\t\t}\n#endif',
+         b'\t\t\t\tfscanf( file, "%f %f %f\\n", &fileUx, &fileUy, &fileUz );'),
+
+        # Fix any remaining %lf format specifiers that should be %f (since OUTPUT_PRECISION is float)
+        (b'fscanf( file, "%lf %lf %lf\\n"',
+         b'fscanf( file, "%f %f %f\\n"'),
+        (b'"%lf %lf %lf\\n"',
+         b'"%f %f %f\\n"'),
+
+        # Fix output with error checking
+        (b'#ifdef SPEC\n\tprintf( "LBM_compareVelocityField: maxDiff = %e  \\n\\n",\n\t        sqrt( maxDiff2 )  );\n#else\n\tprintf( "LBM_compareVelocityField: maxDiff = %e  ==>  %s\\n\\n",\n\t        sqrt( maxDiff2 ),\n\t        sqrt( maxDiff2 ) > 1e-5 ? "##### ERROR #####" : "OK" );\n#endif',
+         b'\tprintf( "LBM_compareVelocityField: maxDiff = %e  ==>  %s\\n\\n",\n\t        sqrt( maxDiff2 ),\n\t        sqrt( maxDiff2 ) > 1e-5 ? "##### ERROR #####" : "OK" );'),
+    ))
+
+    # Timing functions appended to main.c when SPEC stripped them
+    _TIMING_CODE = b'''
 
 void MAIN_startClock( MAIN_Time* time ) {
 \ttime->timeScale = 1.0 / sysconf( _SC_CLK_TCK );
@@ -74,39 +131,37 @@ void MAIN_stopClock( MAIN_Time* time, const MAIN_Param* param ) {
 \t        1.0e-6 * SIZE_X * SIZE_Y * SIZE_Z * param->nTimeSteps /
 \t        (time->tickStop           - time->tickStart          ) / time->timeScale );
 }'''
-            content += timing_code
-
-        return content
 
-    def clean_lbm_c(self, content):
-        """Clean lbm.c"""
-        # Fix OpenMP conditionals
-        content = content.replace('(defined(_OPENMP) || defined(SPEC_OPENMP)) && !defined(SPEC_SUPPRESS_OPENMP) && !defined(SPEC_AUTO_SUPPRESS_OPENMP)', 'defined(_OPENMP)')
-
-        # Fix memory allocation message
-        content = content.replace('#ifndef SPEC\n\tprintf( "LBM_allocateGrid: allocated %.1f MByte\\n",\n\t        size / (1024.0*1024.0) );\n#endif',
-                                 '\tprintf( "LBM_allocateGrid: allocated %.1f MByte\\n",\n\t        size / (1024.0*1024.0) );')
+    def __init__(self):
+        pass
 
-        # Fix variable types in endianness handling
-        content = content.replace('#if !defined(SPEC)\n\t\tint i;\n#else\n               size_t i;\n#endif', '\t\tint i;')
-        content = content.replace('#if !defined(SPEC)\n\t\t\tint i;\n\t\t#else\n\t\t               size_t i;\n\t\t#endif', '\t\t\tint i;')
+    def _apply_replacements(self, fused, content):
+        """Apply every replacement of a fused table in a single pass."""
+        triggers, regex, lookup = fused
+        if not any(trigger in content for trigger in triggers):
+            return content
+        return regex.sub(lambda match: lookup[match.group(0)], content)
 
-        # Fix precision handling in scanf
-        content = content.replace('#if !defined(SPEC)\n\t\t\t\tif( sizeof( OUTPUT_PRECISION ) == sizeof( double )) {\n\t\t\t\t\tfscanf( file, "%lf %lf %lf\\n", &fileUx, &fileUy, &fileUz );\n\t\t\t\t}\n\t\t\t\telse {\n#endif\n\t\t\t\t\tfscanf( file, "%f %f %f\\n", &fileUx, &fileUy, &fileUz );\n#if !defined(SPEC)\n\t\t\t\t}\n#endif',
-                                 '\t\t\t\tfscanf( file, "%f %f %f\\n", &fileUx, &fileUy, &fileUz );')
+    def clean_main_h(self, content):
+        """Clean main.h"""
+        return self._apply_replacements(self._REPLACEMENTS_MAIN_H, content)
 
-        # Fix any remaining %lf format specifiers that should be %f (since OUTPUT_PRECISION is float)
-        content = content.replace('fscanf( file, "%lf %lf %lf\\n"', 'fscanf( file, "%f %f %f\\n"')
-        content = content.replace('"%lf %lf %lf\\n"', '"%f %f %f\\n"')
+    def clean_main_c(self, content):
+        """Clean main.c"""
+        content = self._apply_replacements(self._REPLACEMENTS_MAIN_C, content)
 
-        # Fix output with error checking
-        content = content.replace('#ifdef SPEC\n\tprintf( "LBM_compareVelocityField: maxDiff = %e  \\n\\n",\n\t        sqrt( maxDiff2 )  );\n#else\n\tprintf( "LBM_compareVelocityField: maxDiff = %e  ==>  %s\\n\\n",\n\t        sqrt( maxDiff2 ),\n\t        sqrt( maxDiff2 ) > 1e-5 ? "##### ERROR #####" : "OK" );\n#endif',
-                                 '\tprintf( "LBM_compareVelocityField: maxDiff = %e  ==>  %s\\n\\n",\n\t        sqrt( maxDiff2 ),\n\t        sqrt( maxDiff2 ) > 1e-5 ? "##### ERROR #####" : "OK" );')
+        # Ensure timing functions are always included
+        if b'void MAIN_stopClock( MAIN_Time* time, const MAIN_Param* param ) {' not in content:
+            content += self._TIMING_CODE
 
         return content
 
+    def clean_lbm_c(self, content):
+        """Clean lbm.c"""
+        return self._apply_replacements(self._REPLACEMENTS_LBM_C, content)
+
     def clean_file_content(self, content, filename):
-        """Clean SPEC-specific code from file content based on filename."""
+        """Clean SPEC-specific code from raw (bytes) file content based on filename."""
         original_content = content
         changes_made = []
 
@@ -130,21 +185,37 @@ void MAIN_stopClock( MAIN_Time* time, const MAIN_Param* param ) {
     def should_process_file(self, filepath):
         """Check if file should be processed based on extension."""
         extensions = {'.c', '.h', '.cpp', '.hpp', '.cc', '.cxx'}
-        return filepath.suffix.lower() in extensions
+        return os.path.splitext(filepath)[1].lower() in extensions
 
-    def process_file(self, input_path, output_path):
-        """Process a single file."""
+    def process_file(self, input_path, output_path, dry_run=False):
+        """Process a single file; with dry_run, only report the changes."""
         try:
-            with open(input_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
+            # Work on bytes with text mode's newline translation kept; the
+            # sources are ASCII C, so skipping the UTF-8 decode/encode round
+            # trip changes nothing else
+            content = read_source(input_path)
 
             cleaned_content, changes = self.clean_file_content(content, str(input_path))
 
-            # Create output directory if it doesn't exist
-            output_path.parent.mkdir(parents=True, exist_ok=True)
+            if dry_run:
+                return changes
 
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(cleaned_content)
+            # Create output directory if it doesn't exist
+            output_dir = os.path.dirname(output_path)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+
+            # Write next to the output and rename it into place, so an
+            # interrupted run never leaves a truncated output file behind
+            tmp_path = f"{os.fspath(output_path)}.tmp{os.getpid()}"
+            try:
+                with open(tmp_path, 'wb') as f:
+                    f.write(cleaned_content)
+                os.replace(tmp_path, output_path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
 
             return changes
 
@@ -152,45 +223,96 @@ void MAIN_stopClock( MAIN_Time* time, const MAIN_Param* param ) {
             print(f"Error processing {input_path}: {e}")
             return []
 
-    def process_directory(self, input_dir, output_dir):
-        """Process all files in a directory recursively."""
-        input_path = Path(input_dir)
-        output_path = Path(output_dir)
+    def process_directory(self, input_dir, output_dir, max_workers=None, dry_run=False):
+        """Process all files in a directory recursively.
+
+        Source files are cleaned in parallel using up to max_workers
+        processes (default: one per CPU). With dry_run, nothing is written
+        or copied and only the changes that would be made are printed.
+        """
+        input_dir = os.fspath(input_dir)
+        output_dir = os.fspath(output_dir)
 
-        if not input_path.exists():
+        if not os.path.exists(input_dir):
             raise FileNotFoundError(f"Input directory not found: {input_dir}")
 
+        # Every walked path starts with this prefix, so relative paths are a slice
+        prefix_len = len(os.path.join(input_dir, ''))
+
         total_files = 0
         processed_files = 0
         total_changes = []
+        source_files = []
+        copy_jobs = []
 
-        for file_path in input_path.rglob('*'):
-            if file_path.is_file():
-                total_files += 1
+        for entry in iter_files(input_dir):
+            total_files += 1
 
-                if self.should_process_file(file_path):
-                    # Calculate relative path and output location
-                    relative_path = file_path.relative_to(input_path)
-                    output_file = output_path / relative_path
+            # Calculate relative path and output location
+            relative_path = entry.path[prefix_len:]
+            output_file = os.path.join(output_dir, relative_path)
 
+            if self.should_process_file(entry.name):
+                source_files.append((relative_path, entry.path, output_file))
+            else:
+                # Copy non-source files as-is (but skip Makefile)
+                if entry.name.lower() != 'makefile' and not dry_run:
+                    copy_jobs.append((entry.path, output_file))
+
+        # Files are independent, so clean them across worker processes; map()
+        # keeps results in walk order for the report below
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as executor:
+            results = executor.map(
+                _process_file_worker,
+                [(file_path, output_file, dry_run) for _, file_path, output_file in source_files],
+                chunksize=8
+            )
+
+            # Copy the non-source files while the workers are busy
+            self.copy_files(copy_jobs)
+
+            for (relative_path, _, _), changes in zip(source_files, results):
+                if not dry_run:
                     print(f"Processing: {relative_path}")
-                    changes = self.process_file(file_path, output_file)
 
-                    if changes:
-                        processed_files += 1
-                        total_changes.extend(changes)
-                        print(f"  Changes: {', '.join(changes)}")
+                if changes:
+                    processed_files += 1
+                    total_changes.extend(changes)
+                    if dry_run:
+                        print(f"\nWould modify {relative_path}:")
+                        for change in changes:
+                            print(f"  - {change}")
                     else:
-                        print(f"  No SPEC code found")
-                else:
-                    # Copy non-source files as-is (but skip Makefile)
-                    if file_path.name.lower() != 'makefile':
-                        output_file = output_path / file_path.relative_to(input_path)
-                        output_file.parent.mkdir(parents=True, exist_ok=True)
-                        shutil.copy2(file_path, output_file)
+                        print(f"  Changes: {', '.join(changes)}")
+                elif not dry_run:
+                    print(f"  No SPEC code found")
 
         return total_files, processed_files, total_changes
 
+    def copy_files(self, copy_jobs):
+        """Copy (source, destination) pairs, creating each output directory once.
+
+        The copies are I/O bound, so they are overlapped on a thread pool
+        instead of running one after another.
+        """
+        for parent in {os.path.dirname(destination) for _, destination in copy_jobs}:
+            os.makedirs(parent, exist_ok=True)
+
+        with ThreadPoolExecutor() as executor:
+            # Consume the results so a failed copy raises here
+            list(executor.map(shutil.copy2, *zip(*copy_jobs)))
+
+# Per-process cleaner used by process_directory's worker pool
+_worker_cleaner = None
+
+def _init_worker():
+    global _worker_cleaner
+    _worker_cleaner = LBMSpecCodeCleaner()
+
+def _process_file_worker(job):
+    input_file, output_file, dry_run = job
+    return _worker_cleaner.process_file(input_file, output_file, dry_run)
+
 def main():
     parser = argparse.ArgumentParser(
         description='Remove SPEC proprietary code from LBM fluid dynamics simulation source',
@@ -214,6 +336,8 @@ Examples:
                        help='Verbose output')
     parser.add_argument('--dry-run', action='store_true',
                        help='Show what would be changed without modifying files')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                       help='Number of worker processes for directories (default: CPU count)')
 
     args = parser.parse_args()
 
@@ -225,8 +349,7 @@ Examples:
         if input_path.is_file():
             # Process single file
             if args.dry_run:
-                with open(input_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
+                content = read_source(input_path)
                 _, changes = cleaner.clean_file_content(content, str(input_path))
                 print(f"Would apply changes to {input_path}:")
                 for change in changes:
@@ -245,18 +368,10 @@ Examples:
             # Process directory
             if args.dry_run:
                 print("DRY RUN - No files will be modified")
-                for file_path in input_path.rglob('*'):
-                    if file_path.is_file() and cleaner.should_process_file(file_path):
-                        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            content = f.read()
-                        _, changes = cleaner.clean_file_content(content, str(file_path))
-                        if changes:
-                            print(f"\nWould modify {file_path.relative_to(input_path)}:")
-                            for change in changes:
-                                print(f"  - {change}")
+                cleaner.process_directory(input_path, output_path, max_workers=args.jobs, dry_run=True)
             else:
                 total_files, processed_files, all_changes = cleaner.process_directory(
-                    input_path, output_path
+                    input_path, output_path, max_workers=args.jobs
                 )
 
                 print(f"\nSummary:")
@@ -16,6 +16,398 @@ import sys
 import argparse
 from pathlib import Path
 import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+# The directory walker shared by the cleaners lives in libs/, one level up
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from source_tree import iter_files
+
+# SPEC harness files with no open-source counterpart; they are skipped, not cleaned
+SPEC_ONLY_FILES = frozenset({'spec_qsort.c', 'spec_qsort.h', 'inttypes.h'})
+
+# Ad-hoc patterns used directly by clean_file_content, compiled once at import
+SPEC_VERSION_LINE_RE = re.compile(r'SPEC version\s*\n')
+SPEC_IF_DIRECTIVE_RE = re.compile(r'#if.*?defined\(SPEC\).*?\n')
+SPEC_IFDEF_DIRECTIVE_RE = re.compile(r'#ifdef\s+SPEC.*?\n')
+SPEC_IFNDEF_DIRECTIVE_RE = re.compile(r'#ifndef\s+SPEC.*?\n')
+OPENMP_CONDITIONAL = (
+    '#if (defined(_OPENMP) || defined(SPEC_OPENMP)) && !defined(SPEC_SUPPRESS_OPENMP) && !defined(SPEC_AUTO_SUPPRESS_OPENMP)'
+)
+PRID64_SPACED_FORMAT_RE = re.compile(r'%"\s*PRId64\s*"')
+BROKEN_PRINTF_OPEN_RE = re.compile(r'printf\(\s*"\s*\n')
+SPLIT_PRINTF_STRING_RE = re.compile(r'printf\(\s*"([^"]*?)"\s*\n\s*"([^"]*?)"')
+SPEC_QSORT_INCLUDE_RE = re.compile(r'#include\s*"spec_qsort\.h"')
+SPEC_HEADER_COMMENT_RE = re.compile(r'/\*+\s*\n.*?SPEC version\s*\n', re.MULTILINE)
+
+# mcf.c specific repairs
+BROKEN_VERSION_PRINTF_RE = re.compile(r'printf\(\s*"\s*\nMCF version')
+PRINTF_CONTINUATION_RE = re.compile(r'printf\(\s*"([^"]*?)"\s*\n([^"]*?)"([^"]*?)"', re.MULTILINE)
+BROKEN_VERSION_PRINTF_INDENTED_RE = re.compile(r'printf\(\s*"\s*\n\s*MCF version')
+BROKEN_VERSION_STATEMENT_RE = re.compile(r'printf\(\s*"\s*\nMCF version 1\.11\\n"\s*\);')
+MERGED_PRINTF_RE = re.compile(r'printf\(\s*"([^"]*?)"\s*\);printf\(')
+ESCAPED_QUOTE_PAIR_RE = re.compile(r'"([^"]*?)"\\"([^"]*?)"')
+MERGED_STATEMENT_RE = re.compile(r';\s*([a-zA-Z_][a-zA-Z0-9_]*\s*\()')
+BROKEN_GBR_STRING = 'Weider "\\"GbR (LBW)\\n"'
+MULTILINE_PRINTF_RE = re.compile(r'printf\(\s*"([^"]*?)\s*\n\s*([A-Za-z][^"]*?)"\s*\);', re.MULTILINE | re.DOTALL)
+BROKEN_NEWLINE_PRINTF_RE = re.compile(r'printf\(\s*"\s*\n([^"]*?)\\n"\s*\);')
+GBR_PRINTF_END_RE = re.compile(r'"GbR \(LBW\)\\n"\s*\);')
+
+# The mcf.c repairs as (regex, replacement, trigger) entries, each run applied in
+# order: the version banner broken by SPEC removal first, the other printf damage
+# last. As in the rule dicts, 'trigger' is a literal every match contains; it is
+# checked right before each sub, because an earlier repair can create new matches
+MCF_C_VERSION_REPAIRS = (
+    (BROKEN_VERSION_PRINTF_RE, 'printf( "\\nMCF version', 'MCF version'),
+    # Ensure complete printf statements
+    (PRINTF_CONTINUATION_RE, r'printf( "\1\2\3"', 'printf('),
+    (BROKEN_VERSION_PRINTF_INDENTED_RE, 'printf( "\\nMCF version', 'MCF version'),
+)
+MCF_C_FINAL_REPAIRS = (
+    (BROKEN_VERSION_STATEMENT_RE, 'printf( "\\nMCF version 1.11\\n" );', 'MCF version 1.11'),
+    # Split printf statements that got merged onto one line
+    (MERGED_PRINTF_RE, r'printf( "\1" );\n  printf(', ');printf('),
+    # The copyright line with broken escaping
+    (ESCAPED_QUOTE_PAIR_RE, r'"\1\2"', '"\\"'),
+    # Statements merged without a line break
+    (MERGED_STATEMENT_RE, r';\n  \1', ';'),
+    # A plain string entry is a literal applied with str.replace
+    (BROKEN_GBR_STRING, 'Weider GbR (LBW)\\n"', 'GbR (LBW)'),
+    (MULTILINE_PRINTF_RE, r'printf( "\1\2" );', 'printf('),
+    # Proper string termination and spacing
+    (BROKEN_NEWLINE_PRINTF_RE, r'printf( "\\n\1\\n" );', 'printf('),
+    (GBR_PRINTF_END_RE, r'"GbR (LBW)\\n" );', 'GbR (LBW)'),
+)
+
+# implicit.c specific repairs
+ARC_REDECLARATION_RE = re.compile(r'(\s+)arc_t\* arc = net->arcs;')
+ARC_POINTER_REDECLARATION_RE = re.compile(r'(\s+)arc_t \*arc = ')
+
+# 'arc' is declared as a register variable in implicit.c and then redeclared later
+IMPLICIT_C_REPAIRS = (
+    (ARC_REDECLARATION_RE, r'\1arc = net->arcs;', 'arc_t* arc = net->arcs;'),
+    (ARC_POINTER_REDECLARATION_RE, r'\1arc = ', 'arc_t *arc = '),
+)
+
+# prototyp.h specific repairs
+PROTOTYP_SPEC_CONDITION_RE = re.compile(r'\s*\|\|\s*defined\(SPEC\)')
+TRAILING_BACKSLASH_RE = re.compile(r'\s+\\\s*$')
+PROTOTYP_CONDITION_RE = re.compile(
+    r'defined\(__STDC__\)\s*\|\|\s*defined\(__cplusplus\)\s*\|\|\s*defined\(WANT_STDC_PROTO\)\s*\|\|\s*defined\(SPEC\)'
+)
+ORPHAN_SPEC_CONDITION_RE = re.compile(r'\|\|\s*defined\(SPEC\)')
+
+# Preprocessor lines that open a SPEC conditional; group 1 or 2 is set when the
+# SPEC branch is the #else side (#if !defined(SPEC), #ifndef SPEC)
+SPEC_CONDITIONAL_RE = re.compile(
+    r'[ \t]*#[ \t]*(?:if[ \t]+(!?)[ \t]*defined[ \t]*(?:\([ \t]*SPEC[ \t]*\)|[ \t]+SPEC)|(ifndef|ifdef)[ \t]+SPEC)[ \t\r]*'
+)
+DIRECTIVE_RE = re.compile(r'[ \t]*#[ \t]*(if|ifdef|ifndef|elif|else|endif)\b')
+
+def _find_conditional_end(lines, start):
+    """Return (else_at, end_at) for the conditional opened at lines[start].
+
+    Nested conditionals are tracked by depth, so an inner #else/#endif is never
+    mistaken for the block's own. Returns None for blocks with an #elif at their
+    top level or without a matching #endif.
+    """
+    else_at = None
+    depth = 0
+    for j in range(start + 1, len(lines)):
+        if not lines[j].lstrip().startswith('#'):
+            continue
+        directive = DIRECTIVE_RE.match(lines[j])
+        if directive is None:
+            continue
+        keyword = directive.group(1)
+        if keyword in ('if', 'ifdef', 'ifndef'):
+            depth += 1
+        elif keyword == 'endif':
+            if depth == 0:
+                return else_at, j
+            depth -= 1
+        elif depth == 0 and keyword == 'elif':
+            return None
+        elif depth == 0 and keyword == 'else' and else_at is None:
+            else_at = j
+    return None
+
+def _resolve_spec_conditionals(lines, fired, spec_only):
+    """Return lines with SPEC conditionals replaced by their non-SPEC branch.
+
+    With spec_only, only "#ifdef SPEC" / "#if defined(SPEC)" blocks without an
+    #else are removed; the others are left for the dedicated patterns.
+    """
+    out = []
+    i = 0
+    while i < len(lines):
+        match = SPEC_CONDITIONAL_RE.fullmatch(lines[i])
+        block = _find_conditional_end(lines, i) if match is not None else None
+        negated = match is not None and (match.group(1) == '!' or match.group(2) == 'ifndef')
+        if block is None or (spec_only and (negated or block[0] is not None)):
+            out.append(lines[i])
+            i += 1
+            continue
+
+        else_at, end_at = block
+        first = lines[i + 1:else_at if else_at is not None else end_at]
+        second = lines[else_at + 1:end_at] if else_at is not None else []
+
+        if negated:
+            kept = first
+            fired['Use non-SPEC code blocks'] = None
+        elif else_at is not None:
+            kept = second
+            fired['Use non-SPEC code blocks'] = None
+        else:
+            kept = []
+            if match.group(2) == 'ifdef':
+                fired['Remove SPEC-only code blocks'] = None
+            else:
+                fired['Remove SPEC-only conditional blocks'] = None
+
+        out.extend(_resolve_spec_conditionals(kept, fired, spec_only))
+        i = end_at + 1
+
+    return out
+
+def _strip_spec_blocks(content, changes_made, spec_only):
+    """Resolve SPEC blocks in a single pass over the lines of content."""
+    fired = {}
+    lines = _resolve_spec_conditionals(content.split('\n'), fired, spec_only)
+    if not fired:
+        return content
+    changes_made.extend(fired)
+    return '\n'.join(lines)
+
+def strip_spec_only_blocks(content, changes_made):
+    """Remove "#ifdef SPEC" / "#if defined(SPEC)" blocks that have no #else branch."""
+    return _strip_spec_blocks(content, changes_made, spec_only=True)
+
+def strip_spec_conditionals(content, changes_made):
+    """Resolve every remaining SPEC #if/#ifdef block to its non-SPEC branch."""
+    return _strip_spec_blocks(content, changes_made, spec_only=False)
+
+def strip_spec_comments(content):
+    """Remove every /* ... */ comment whose text mentions SPEC.
+
+    A linear scan with str.find. Unlike a lazy DOTALL regex, a match can
+    never start at a plain comment and run across code into a later SPEC one.
+    """
+    out = []
+    i = 0
+    while True:
+        start = content.find('/*', i)
+        if start < 0:
+            break
+        end = content.find('*/', start + 2)
+        if end < 0:
+            break
+        if 'SPEC' in content[start + 2:end]:
+            out.append(content[i:start])
+            i = end + 2
+        else:
+            out.append(content[i:end + 2])
+            i = end + 2
+    if not out:
+        return content
+    out.append(content[i:])
+    return ''.join(out)
+
+SPEC_TIMING_BLOCK_RE = re.compile(r'#ifndef SPEC\s*\n')
+
+def collapse_blank_lines(content):
+    """Collapse each run of two or more whitespace-only lines into one empty line.
+
+    A single pass over the lines, with the same result as replacing every
+    whitespace span holding three or more newlines by two newlines. The first
+    and last lines are never part of a run: that replacement keeps the
+    whitespace before the span's first newline and after its last one.
+    """
+    lines = content.split('\n')
+    last = len(lines) - 1
+    out = [lines[0]]
+    i = 1
+    while i < last:
+        line = lines[i]
+        if line and not line.isspace():
+            out.append(line)
+            i += 1
+            continue
+
+        run_end = i + 1
+        while run_end < last and (not lines[run_end] or lines[run_end].isspace()):
+            run_end += 1
+        out.append('' if run_end - i > 1 else line)
+        i = run_end
+
+    if last:
+        out.append(lines[last])
+    return '\n'.join(out)
+
+def enable_spec_timing_blocks(content, changes_made):
+    r"""Unwrap "#ifndef SPEC" blocks whose body mentions time.
+
+    Finds the same matches as r'#ifndef SPEC\s*\n(.*?time.*?)\n#endif' with
+    DOTALL, but with str.find. The lazy regex retried the #endif search after
+    every later "time", which is quadratic when no #endif follows.
+    """
+    out = []
+    pos = 0
+    while True:
+        head = SPEC_TIMING_BLOCK_RE.search(content, pos)
+        if head is None:
+            break
+        word = content.find('time', head.end())
+        end = content.find('\n#endif', word + 4) if word >= 0 else -1
+        if end < 0:
+            # Any later block would need a "time" and #endif even further on
+            break
+        out.append(content[pos:head.start()])
+        out.append(content[head.end():end])
+        pos = end + len('\n#endif')
+    if not out:
+        return content
+    changes_made.append('Enable timing code')
+    out.append(content[pos:])
+    return ''.join(out)
+
+ARC_DECLARATION = 'register arc_t *arcout, *arcin, *arcnew, *stop, *sorted_array, *arc;'
+ARC_REDEFINITION = 'arc_t* arc = net->arcs;'
+
+def _preceded_by_space(content, index, start):
+    """Return True when content has whitespace just before index, at or after start."""
+    return index > start and content[index - 1].isspace()
+
+def fix_arc_redefinition(content, changes_made):
+    r"""Turn the first "arc_t* arc = net->arcs;" after each arc_t register
+    declaration in implicit.c into a plain assignment.
+
+    Finds the same matches as the DOTALL regex
+    r'(\s+register arc_t \*arcout, ...\*arc;.*?)(\s+arc_t\* arc = net->arcs;)'
+    with str.find, so a declaration with no redefinition after it costs one
+    search instead of a lazy scan from every whitespace character before it.
+    """
+    out = []
+    pos = 0
+    while True:
+        decl = content.find(ARC_DECLARATION, pos)
+        while decl >= 0 and not _preceded_by_space(content, decl, pos):
+            decl = content.find(ARC_DECLARATION, decl + 1)
+        if decl < 0:
+            break
+
+        decl_end = decl + len(ARC_DECLARATION)
+        use = content.find(ARC_REDEFINITION, decl_end)
+        while use >= 0 and not _preceded_by_space(content, use, decl_end):
+            use = content.find(ARC_REDEFINITION, use + 1)
+        if use < 0:
+            # Any later declaration would need a redefinition even further on
+            break
+
+        # The whitespace before the redefinition is replaced along with it
+        space = use - 1
+        while space > decl_end and content[space - 1].isspace():
+            space -= 1
+        out.append(content[pos:space])
+        out.append('\n       arc = net->arcs;')
+        pos = use + len(ARC_REDEFINITION)
+    if not out:
+        return content
+    changes_made.append('Fix arc variable redefinition in implicit.c')
+    out.append(content[pos:])
+    return ''.join(out)
+
+def _fix_line_structure(lines):
+    """Apply the line-based fixes to lines in one pass and return the new lines.
+
+    Three fixes run as a pipeline, each seeing the output of the one before:
+    a printf line with an unclosed quote is joined with the lines that close
+    it, an "#else" directly followed by "#endif" is dropped together with it,
+    and #endif/#else/#elif lines with no open #if are removed.
+    """
+    out = []
+    endif_balance = 0
+    # An "#else" waiting to see whether the next line is "#endif"
+    pending_else = None
+    count = len(lines)
+    i = 0
+    while i < count:
+        line = lines[i]
+        # Check for broken printf statements
+        if 'printf(' in line and line.count('"') % 2 == 1:
+            # This line has an unclosed quote, look for the closing line
+            j = i + 1
+            while j < count:
+                following = lines[j].strip()
+                if following == '' or following.endswith('");'):
+                    break
+                line += following
+                j += 1
+            if j < count:
+                line += lines[j].strip()
+                i = j
+        i += 1
+
+        # Only lines holding a '#' can be directives; the rest compare as blank
+        stripped = line.strip() if '#' in line else ''
+        if pending_else is not None:
+            if stripped == '#endif':
+                # Skip both #else and #endif
+                pending_else = None
+                continue
+            if endif_balance > 0:
+                out.append(pending_else)
+            pending_else = None
+        if stripped == '#else':
+            pending_else = line
+            continue
+
+        if stripped.startswith('#if'):
+            endif_balance += 1
+            out.append(line)
+        elif stripped == '#endif':
+            if endif_balance > 0:
+                endif_balance -= 1
+                out.append(line)
+            # Skip orphaned #endif statements
+        elif stripped.startswith(('#else', '#elif')):
+            if endif_balance > 0:
+                out.append(line)
+            # Skip orphaned #else/#elif statements
+        else:
+            out.append(line)
+
+    if pending_else is not None and endif_balance > 0:
+        out.append(pending_else)
+    return out
+
+def decode_source(data):
+    """Decode raw source bytes as open(path, encoding='utf-8', errors='ignore').read() would.
+
+    That includes its universal-newline translation of "\r\n" and lone "\r" to "\n".
+    """
+    content = data.decode('utf-8', errors='ignore')
+    if '\r' in content:
+        content = content.replace('\r\n', '\n').replace('\r', '\n')
+    return content
+
+def read_source(path):
+    """Read a source file as text with one read and one decode."""
+    return decode_source(Path(path).read_bytes())
+
+def _expand_template(template):
+    """Return a constant replacement template with its escapes expanded, as sub() would."""
+    return re.compile('').sub(template, '')
+
+# Regex source that can only match one fixed string: ordinary characters and
+# backslash-escaped punctuation, nothing else
+LITERAL_PATTERN_RE = re.compile(r'(?:[^\\.^$*+?{}\[\]|()]|\\[^\w\s])*')
+
+def _literal_text(pattern, flags):
+    """Return the one string pattern matches, or None if it is not a plain literal."""
+    if flags & (re.IGNORECASE | re.VERBOSE) or not LITERAL_PATTERN_RE.fullmatch(pattern):
+        return None
+    return re.sub(r'\\(.)', r'\1', pattern)
 
 class MCFSpecCodeCleaner:
     def __init__(self):
@@ -24,276 +416,330 @@ class MCFSpecCodeCleaner:
                 # Remove SPEC conditional compilation includes
                 'spec_qsort_include': {
                     'pattern': r'#if defined\(SPEC\)\s*\n#\s*include\s+"spec_qsort\.h"\s*\n#endif',
+                    'flags': 0,
                     'replacement': '',
-                    'description': 'Remove SPEC qsort include'
+                    'description': 'Remove SPEC qsort include',
+                    'trigger': 'spec_qsort.h'
                 },
 
                 # Remove SPEC includes
                 'spec_include_qsort': {
                     'pattern': r'#if defined\(SPEC\)\s*\n#\s*include\s+"spec_qsort\.h"\s*\n#endif\s*\n',
+                    'flags': 0,
                     'replacement': '',
-                    'description': 'Remove SPEC qsort header include'
+                    'description': 'Remove SPEC qsort header include',
+                    'trigger': 'spec_qsort.h'
                 },
 
                 # Remove SPEC stdint includes
                 'spec_stdint_includes': {
                     'pattern': r'#ifdef SPEC\s*\n#\s*include <stdint\.h>\s*\n#\s*if defined\(SPEC_WINDOWS\) && !defined\(SPEC_HAVE_INTTYPES_H\)\s*\n#\s*include "win32/inttypes\.h"\s*\n#\s*else\s*\n#\s*include <inttypes\.h>\s*\n#\s*endif\s*\n/\* inttypes\.h is just to get PRId64; if it\'s not present \(not C99\?\), guess \*/\s*\n#\s*if !defined\(PRId64\)\s*\n#\s*if defined\(SPEC_LP64\) \|\| defined\(SPEC_ILP64\)\s*\n#\s*define PRId64 "ld"\s*\n#\s*else\s*\n#\s*define PRId64 "lld"\s*\n#\s*endif\s*\n#\s*endif\s*\n#\s*define LONG int64_t\s*\n#else\s*\n#\s*define LONG long\s*\n#endif',
+                    'flags': 0,
                     'replacement': '#define LONG long\n#include <inttypes.h>\n#ifndef PRId64\n#define PRId64 "ld"\n#endif',
-                    'description': 'Replace SPEC stdint includes with standard includes'
+                    'description': 'Replace SPEC stdint includes with standard includes',
+                    'trigger': 'SPEC_HAVE_INTTYPES_H'
                 },
 
                 # Remove SPEC OpenMP conditionals
                 'spec_openmp_conditionals': {
                     'pattern': r'#if \(defined\(_OPENMP\) \|\| defined\(SPEC_OPENMP\)\) && !defined\(SPEC_SUPPRESS_OPENMP\) && !defined\(SPEC_AUTO_SUPPRESS_OPENMP\)',
+                    'flags': 0,
                     'replacement': '#ifdef _OPENMP',
-                    'description': 'Simplify OpenMP conditionals'
+                    'description': 'Simplify OpenMP conditionals',
+                    'trigger': 'SPEC_AUTO_SUPPRESS_OPENMP'
                 },
 
                 # Remove SPEC qsort calls
                 'spec_qsort_calls': {
                     'pattern': r'#if defined\(SPEC\)\s*\n\s*spec_qsort\((.*?)\);\s*\n#else\s*\n\s*qsort\((.*?)\);\s*\n#endif',
+                    'flags': re.DOTALL,
                     'replacement': r'        qsort(\2);',
-                    'description': 'Use standard qsort instead of SPEC version'
+                    'description': 'Use standard qsort instead of SPEC version',
+                    'trigger': 'spec_qsort('
                 },
 
                 # Remove SPEC comments and headers
                 'spec_header_comments': {
                     'pattern': r', SPEC version',
+                    'flags': 0,
                     'replacement': '',
-                    'description': 'Remove SPEC version indicators from headers'
+                    'description': 'Remove SPEC version indicators from headers',
+                    'trigger': ', SPEC version'
                 },
 
                 # Remove SPEC memory limits
                 'spec_memory_limits': {
                     'pattern': r'#if defined\(SPEC\)\s*\n#define MAX_NEW_ARCS_SMALL_NET 2000000\s*\n#else\s*\n#define MAX_NEW_ARCS_SMALL_NET 5000000\s*\n#endif',
+                    'flags': 0,
                     'replacement': '#define MAX_NEW_ARCS_SMALL_NET 5000000',
-                    'description': 'Use non-SPEC memory limits'
+                    'description': 'Use non-SPEC memory limits',
+                    'trigger': 'MAX_NEW_ARCS_SMALL_NET 2000000'
                 },
 
                 # Remove SPEC Windows detection
                 'spec_windows_detection': {
                     'pattern': r'defined\(SPEC_WINDOWS\)',
+                    'flags': 0,
                     'replacement': 'defined(_WIN32)',
-                    'description': 'Use standard Windows detection'
+                    'description': 'Use standard Windows detection',
+                    'trigger': 'defined(SPEC_WINDOWS)'
                 },
 
                 # Remove SPEC timing conditionals
                 'spec_timing_conditionals': {
-                    'pattern': r'#ifndef SPEC\s*\n(.*?time.*?)\n#endif',
-                    'replacement': r'\1',
-                    'description': 'Enable timing code'
+                    'handler': enable_spec_timing_blocks,
+                    'trigger': '#ifndef SPEC'
                 },
 
                 # Remove SPEC thread number output suppression
                 'spec_thread_output': {
                     'pattern': r'#ifndef SPEC\s*\n#ifdef _OPENMP\s*\n\s*printf\(\s*"number of threads\s*:\s*%d\\n",\s*omp_get_max_threads\(\)\s*\);\s*\n#else\s*\n\s*printf\(\s*"single threaded\\n"\s*\);\s*\n#endif\s*\n#endif',
+                    'flags': 0,
                     'replacement': '#ifdef _OPENMP\n  printf( "number of threads          : %d\\n", omp_get_max_threads() );\n#else\n  printf( "single threaded\\n" );\n#endif',
-                    'description': 'Enable thread count output'
+                    'description': 'Enable thread count output',
+                    'trigger': '#ifndef SPEC'
                 },
 
                 # Remove SPEC report conditionals
                 'spec_report_conditionals': {
                     'pattern': r'#if defined\(REPORT\) \|\| defined\(SPEC\)',
+                    'flags': 0,
                     'replacement': '#ifdef REPORT',
-                    'description': 'Simplify report conditionals'
-                },
-
-                # Remove SPEC defines and ifdefs
-                'spec_defines': {
-                    'pattern': r'#ifdef SPEC\s*\n.*?\n#endif\s*\n',
-                    'replacement': '',
-                    'description': 'Remove SPEC-only code blocks'
+                    'description': 'Simplify report conditionals',
+                    'trigger': 'defined(REPORT) || defined(SPEC)'
                 },
 
-                # Remove standalone SPEC conditionals
-                'spec_standalone_blocks': {
-                    'pattern': r'#if defined\(SPEC\)\s*\n(.*?)\n#endif',
-                    'replacement': '',
-                    'description': 'Remove SPEC-only conditional blocks'
+                # Remove SPEC-only #ifdef SPEC / #if defined(SPEC) blocks
+                'spec_only_blocks': {
+                    'handler': strip_spec_only_blocks,
+                    'trigger': 'SPEC'
                 },
 
                 # Remove SPEC version strings in main output
                 'spec_version_output': {
                     'pattern': r'printf\(\s*"\\nMCF SPEC CPU version',
+                    'flags': 0,
                     'replacement': 'printf( "\\nMCF version',
-                    'description': 'Remove SPEC from version string'
+                    'description': 'Remove SPEC from version string',
+                    'trigger': 'MCF SPEC CPU version'
                 },
 
                 # Fix PRId64 format specifiers in printf statements
                 'fix_printf_format': {
                     'pattern': r'printf\(\s*"([^"]*?)%"\s*PRId64\s*"([^"]*?)",',
+                    'flags': 0,
                     'replacement': r'printf( "\1%ld\2",',
-                    'description': 'Replace PRId64 with %ld in printf statements'
+                    'description': 'Replace PRId64 with %ld in printf statements',
+                    'trigger': 'PRId64'
                 },
 
                 # Fix multiline printf statements with PRId64
                 'fix_multiline_printf': {
                     'pattern': r'printf\(\s*"([^"]*?)%"\s*PRId64\s*"([^"]*?)"',
+                    'flags': 0,
                     'replacement': r'printf( "\1%ld\2"',
-                    'description': 'Fix multiline printf format strings'
+                    'description': 'Fix multiline printf format strings',
+                    'trigger': 'PRId64'
                 },
 
                 # Clean up AT_ZERO undef for SPEC
                 'spec_at_zero_undef': {
                     'pattern': r'/\* #define AT_ZERO\s+3\s+NOT ALLOWED FOR THE SPEC VERSION \*/\s*\n#undef AT_ZERO',
+                    'flags': 0,
                     'replacement': '#define AT_ZERO 3',
-                    'description': 'Re-enable AT_ZERO for non-SPEC version'
+                    'description': 'Re-enable AT_ZERO for non-SPEC version',
+                    'trigger': 'NOT ALLOWED FOR THE SPEC VERSION'
                 },
 
                 # Remove SPEC debug suppressions
                 'spec_debug_defines': {
                     'pattern': r'//#define DEBUG 1\s*\n//#define AT_HOME 1',
+                    'flags': 0,
                     'replacement': '#define DEBUG 1\n#define AT_HOME 1',
-                    'description': 'Enable debug and AT_HOME defines'
+                    'description': 'Enable debug and AT_HOME defines',
+                    'trigger': '//#define DEBUG 1'
                 },
 
-                # Remove SPEC from prototype detection in prototyp.h
+                # Remove SPEC from prototype detection in prototyp.h (any number of
+                # repeated "|| defined(SPEC)" clauses are consumed in the same pass)
                 'spec_prototype_macro': {
-                    'pattern': r'defined\(__STDC__\)\s*\|\|\s*defined\(__cplusplus\)\s*\|\|\s*defined\(WANT_STDC_PROTO\)\s*\|\|\s*defined\(SPEC\)',
+                    'pattern': r'defined\(__STDC__\)\s*\|\|\s*defined\(__cplusplus\)\s*\|\|\s*defined\(WANT_STDC_PROTO\)(?:\s*\|\|\s*defined\(SPEC\))+',
+                    'flags': 0,
                     'replacement': 'defined(__STDC__) || defined(__cplusplus) || defined(WANT_STDC_PROTO)',
-                    'description': 'Remove SPEC from prototype detection'
+                    'description': 'Remove SPEC from prototype detection',
+                    'trigger': 'defined(SPEC)'
                 },
 
                 # Remove SPEC-style numbered output pattern
                 'spec_numbered_output': {
                     'pattern': r'if \(argc == 3\) \{\s*\n\s*outnum = atoi\(argv\[2\]\);\s*\n\s*sprintf\(outfile,"mcf\.%d\.out",outnum\);\s*\n\s*\} else \{\s*\n\s*strcpy\(outfile,"mcf\.out"\);\s*\n\s*\}',
+                    'flags': 0,
                     'replacement': 'strcpy(outfile, "mcf.out");',
-                    'description': 'Simplify output file handling (remove SPEC numbered outputs)'
+                    'description': 'Simplify output file handling (remove SPEC numbered outputs)',
+                    'trigger': 'sprintf(outfile,"mcf.%d.out",outnum);'
                 },
 
                 # Remove SPEC-style checksum output
                 'spec_checksum_output': {
                     'pattern': r'printf\(\s*"checksum\s*:\s*%0\.0f\\n",\s*net\.optcost\s*\);',
+                    'flags': 0,
                     'replacement': 'printf( "optimal cost               : %.0f\\n", net.optcost );',
-                    'description': 'Replace checksum output with more descriptive text'
+                    'description': 'Replace checksum output with more descriptive text',
+                    'trigger': '"checksum'
                 },
 
                 # Remove SPEC hardcoded constants
                 'spec_hardcoded_limits': {
                     'pattern': r'#define MAX_NB_TRIPS_FOR_SMALL_NET 15000\s*\n#define MAX_NEW_ARCS_SMALL_NET 5000000\s*\n#define MAX_NEW_ARCS_LARGE_NET 28900000',
+                    'flags': 0,
                     'replacement': '#define MAX_NB_TRIPS_FOR_SMALL_NET 15000\n#define MAX_NEW_ARCS_SMALL_NET 8000000\n#define MAX_NEW_ARCS_LARGE_NET 40000000',
-                    'description': 'Increase limits beyond SPEC constraints'
+                    'description': 'Increase limits beyond SPEC constraints',
+                    'trigger': '#define MAX_NEW_ARCS_LARGE_NET 28900000'
                 },
 
                 # Remove SPEC memory buffer constants
                 'spec_memory_buffers': {
                     'pattern': r'#define MAX_NEW_ARCS_PUFFER_LARGE_NET 4000000\s*\n#define MAX_NEW_ARCS_PUFFER_SMALL_NET 1000000',
+                    'flags': 0,
                     'replacement': '#define MAX_NEW_ARCS_PUFFER_LARGE_NET 8000000\n#define MAX_NEW_ARCS_PUFFER_SMALL_NET 2000000',
-                    'description': 'Increase memory buffers beyond SPEC limits'
+                    'description': 'Increase memory buffers beyond SPEC limits',
+                    'trigger': '#define MAX_NEW_ARCS_PUFFER_SMALL_NET 1000000'
                 },
 
                 # Remove SPEC iteration limits
                 'spec_iteration_limits': {
                     'pattern': r'#define ITERATIONS_FOR_SMALL_NET\s+1000\s*\n#define ITERATIONS_FOR_BIG_NET\s+2000',
+                    'flags': 0,
                     'replacement': '#define ITERATIONS_FOR_SMALL_NET  2000\n#define ITERATIONS_FOR_BIG_NET    5000',
-                    'description': 'Increase iteration limits for better optimization'
+                    'description': 'Increase iteration limits for better optimization',
+                    'trigger': '#define ITERATIONS_FOR_BIG_NET'
                 },
 
                 # Fix SPEC-style minimal input validation
                 'spec_minimal_validation': {
                     'pattern': r'if\(\s*argc\s*<\s*2\s*\)\s*\n\s*return\s*-1;',
+                    'flags': 0,
                     'replacement': 'if( argc < 2 ) {\n    printf("Usage: %s input_file [output_number]\\n", argv[0]);\n    printf("  input_file: MCF problem input file\\n");\n    printf("  output_number: optional output file number (creates mcf.N.out)\\n");\n    return -1;\n  }',
-                    'description': 'Add proper usage information'
+                    'description': 'Add proper usage information',
+                    'trigger': 'argc'
                 },
 
                 # Enable timing that SPEC might suppress
                 'spec_timing_suppression': {
                     'pattern': r'#ifndef SPEC\s*\n(.*?time.*?)\s*\n#endif',
+                    'flags': 0,
                     'replacement': r'\1',
-                    'description': 'Re-enable timing code suppressed for SPEC'
+                    'description': 'Re-enable timing code suppressed for SPEC',
+                    'trigger': '#ifndef SPEC'
                 },
 
                 # Remove SPEC version indicator from output
                 'spec_version_string': {
                     'pattern': r'printf\(\s*"MCF version 1\.11\\n"\s*\);',
+                    'flags': 0,
                     'replacement': 'printf( "MCF version 1.11 (open source)\\n" );',
-                    'description': 'Clarify this is the open source version'
+                    'description': 'Clarify this is the open source version',
+                    'trigger': 'MCF version 1.11'
                 },
 
                 # Fix SPEC-style thread reporting suppression
                 'spec_thread_reporting': {
                     'pattern': r'//\s*printf\(\s*"number of threads\s*:\s*%d\\n",\s*omp_get_max_threads\(\)\s*\);',
+                    'flags': 0,
                     'replacement': 'printf( "number of threads          : %d\\n", omp_get_max_threads() );',
-                    'description': 'Re-enable thread count reporting'
+                    'description': 'Re-enable thread count reporting',
+                    'trigger': 'omp_get_max_threads()'
                 },
 
                 # Remove SPEC force single-threading
                 'spec_force_single_thread': {
                     'pattern': r'//\s*omp_set_num_threads\(1\);\s*//\s*Uncomment to force single thread',
+                    'flags': 0,
                     'replacement': '// omp_set_num_threads(1); // Uncomment to force single thread',
-                    'description': 'Clean up threading comments'
+                    'description': 'Clean up threading comments',
+                    'trigger': 'Uncomment to force single thread'
                 },
 
                 # Handle SPEC scanf patterns specifically - exact format from readmin.c
                 'spec_scanf_2param': {
                     'pattern': r'#ifdef SPEC\s*\n\s*if\(\s*sscanf\(\s*instring,\s*"%"\s*PRId64\s*"\s*%"\s*PRId64\s*,\s*&t,\s*&h\s*\)\s*!=\s*2\s*\)\s*\n#else\s*\n\s*if\(\s*sscanf\(\s*instring,\s*"%ld\s*%ld",\s*&t,\s*&h\s*\)\s*!=\s*2\s*\)\s*\n#endif',
+                    'flags': 0,
                     'replacement': '    if( sscanf( instring, "%ld %ld", &t, &h ) != 2 )',
-                    'description': 'Fix 2-parameter scanf format'
+                    'description': 'Fix 2-parameter scanf format',
+                    'trigger': '#ifdef SPEC'
                 },
 
                 'spec_scanf_2param_variant': {
                     'pattern': r'#ifdef SPEC\s*\n\s*if\(\s*sscanf\(\s*instring,\s*"%"\s*PRId64\s*"\s*%"\s*PRId64\s*,\s*&t,\s*&h\s*\)\s*!=\s*2\s*\|\|\s*t\s*>\s*h\s*\)\s*\n#else\s*\n\s*if\(\s*sscanf\(\s*instring,\s*"%ld\s*%ld",\s*&t,\s*&h\s*\)\s*!=\s*2\s*\|\|\s*t\s*>\s*h\s*\)\s*\n#endif',
+                    'flags': 0,
                     'replacement': '        if( sscanf( instring, "%ld %ld", &t, &h ) != 2 || t > h )',
-                    'description': 'Fix 2-parameter scanf format with condition'
+                    'description': 'Fix 2-parameter scanf format with condition',
+
+                    'trigger': '#ifdef SPEC'
                 },
 
                 'spec_scanf_3param': {
                     'pattern': r'#ifdef SPEC\s*\n\s*if\(\s*sscanf\(\s*instring,\s*"%"\s*PRId64\s*"\s*%"\s*PRId64\s*"\s*%"\s*PRId64\s*,\s*&t,\s*&h,\s*&c\s*\)\s*!=\s*3\s*\)\s*\n#else\s*\n\s*if\(\s*sscanf\(\s*instring,\s*"%ld\s*%ld\s*%ld",\s*&t,\s*&h,\s*&c\s*\)\s*!=\s*3\s*\)\s*\n#endif',
+                    'flags': 0,
                     'replacement': '        if( sscanf( instring, "%ld %ld %ld", &t, &h, &c ) != 3 )',
-                    'description': 'Fix 3-parameter scanf format'
-                },
+                    'description': 'Fix 3-parameter scanf format',
 
-                # Remove SPEC prototype detection
-                'spec_prototype_detection': {
-                    'pattern': r'defined\(__STDC__\)\s*\|\|\s*defined\(__cplusplus\)\s*\|\|\s*defined\(WANT_STDC_PROTO\)\s*\|\|\s*defined\(SPEC\)',
-                    'replacement': 'defined(__STDC__) || defined(__cplusplus) || defined(WANT_STDC_PROTO)',
-                    'description': 'Remove SPEC from prototype detection'
+                    'trigger': '#ifdef SPEC'
                 },
 
                 # Handle SPEC inttypes include guard
                 'spec_inttypes_guard': {
                     'pattern': r'#if !defined\(SPEC\)\s*\n#include "stdint\.h"\s*\n#endif',
+                    'flags': 0,
                     'replacement': '#include <stdint.h>',
-                    'description': 'Use standard stdint.h include'
+                    'description': 'Use standard stdint.h include',
+                    'trigger': '#if !defined(SPEC)'
                 },
 
                 # Prevent DEBUG from being undefined
                 'spec_debug_undef': {
                     'pattern': r'#undef DEBUG\s*\n',
+                    'flags': 0,
                     'replacement': '// #undef DEBUG  // Keep DEBUG enabled\n',
-                    'description': 'Keep DEBUG enabled'
+                    'description': 'Keep DEBUG enabled',
+                    'trigger': '#undef DEBUG'
                 },
 
                 # Enhanced prototyp.h specific patterns
-                'prototyp_spec_removal': {
-                    'pattern': r'(defined\(__STDC__\)\s*\|\|\s*defined\(__cplusplus\)\s*\|\|\s*defined\(WANT_STDC_PROTO\))\s*\|\|\s*defined\(SPEC\)',
-                    'replacement': r'\1',
-                    'description': 'Remove SPEC from prototype detection macro in prototyp.h'
-                },
-
                 'prototyp_spec_standalone': {
                     'pattern': r'\|\|\s*defined\(SPEC\)',
+                    'flags': 0,
                     'replacement': '',
-                    'description': 'Remove standalone SPEC condition from prototyp.h'
+                    'description': 'Remove standalone SPEC condition from prototyp.h',
+
+                    'trigger': 'defined(SPEC)'
                 },
 
                 'prototyp_clean_whitespace': {
                     'pattern': r'(#define _PROTO_\( args \)\s+args)\s*\n\s*\n\s*\n',
+                    'flags': 0,
                     'replacement': r'\1\n\n',
-                    'description': 'Clean up extra whitespace in prototyp.h after SPEC removal'
+                    'description': 'Clean up extra whitespace in prototyp.h after SPEC removal',
+
+                    'trigger': '#define _PROTO_( args )'
                 },
 
                 'prototyp_fix_conditional': {
                     'pattern': r'#if\s+defined\(__STDC__\)\s*\|\|\s*defined\(__cplusplus\)\s*\|\|\s*defined\(WANT_STDC_PROTO\)\s*\n',
+                    'flags': 0,
                     'replacement': '#if defined(__STDC__) || defined(__cplusplus) || defined(WANT_STDC_PROTO)\n',
-                    'description': 'Normalize conditional formatting in prototyp.h'
+                    'description': 'Normalize conditional formatting in prototyp.h',
+
+                    'trigger': 'defined(WANT_STDC_PROTO)'
                 },
 
                 # Special handling for prototyp.h file structure
                 'prototyp_header_guard': {
                     'pattern': r'(#ifndef _PROTOTYP_H\s*\n#define _PROTOTYP_H\s*\n\s*)(.*?)(#endif\s*\n?)$',
+                    'flags': re.MULTILINE,
                     'replacement': r'\1\2\3',
-                    'description': 'Preserve prototyp.h header guard structure'
+                    'description': 'Preserve prototyp.h header guard structure',
+                    'trigger': '#ifndef _PROTOTYP_H'
                 }
             }
 
@@ -302,92 +748,118 @@ class MCFSpecCodeCleaner:
                 # Restore includes that might be needed
                 'add_standard_includes': {
                     'pattern': r'(#include <stdio\.h>)',
+                    'flags': 0,
                     'replacement': r'\1\n#include <time.h>\n#include <sys/time.h>',
-                    'description': 'Add standard timing includes'
+                    'description': 'Add standard timing includes',
+                    'trigger': '#include <stdio.h>'
                 },
 
                 # Ensure proper LONG definition
                 'ensure_long_definition': {
                     'pattern': r'#define LONG long\s*\n#include <inttypes\.h>',
+                    'flags': 0,
                     'replacement': '#include <inttypes.h>\n#include <stdint.h>\n#define LONG long',
-                    'description': 'Ensure proper LONG type definition'
+                    'description': 'Ensure proper LONG type definition',
+                    'trigger': '#define LONG long'
                 },
 
                 # Restore normal qsort usage
                 'restore_qsort_usage': {
                     'pattern': r'spec_qsort\(',
+                    'flags': 0,
                     'replacement': 'qsort(',
-                    'description': 'Use standard qsort function'
+                    'description': 'Use standard qsort function',
+                    'trigger': 'spec_qsort('
                 },
 
                 # Enable timing by default
                 'enable_timing': {
                     'pattern': r'#ifdef INTERNAL_TIMING',
+                    'flags': 0,
                     'replacement': '#define INTERNAL_TIMING\n#ifdef INTERNAL_TIMING',
-                    'description': 'Enable internal timing'
+                    'description': 'Enable internal timing',
+                    'trigger': '#ifdef INTERNAL_TIMING'
                 },
 
                 # Remove //omp_set_num_threads(1); comment for SPEC
                 'enable_omp_threads': {
                     'pattern': r'//omp_set_num_threads\(1\);',
+                    'flags': 0,
                     'replacement': '// omp_set_num_threads(1); // Uncomment to force single thread',
-                    'description': 'Allow multi-threading by default'
+                    'description': 'Allow multi-threading by default',
+                    'trigger': '//omp_set_num_threads(1);'
                 },
 
                 # Fix printf format for checksum
                 'fix_checksum_format': {
                     'pattern': r'printf\("ORG_COST: %f",',
+                    'flags': 0,
                     'replacement': 'printf("ORG_COST: %.0f\\n",',
-                    'description': 'Fix format for ORG_COST output'
+                    'description': 'Fix format for ORG_COST output',
+                    'trigger': 'printf("ORG_COST: %f",'
                 },
 
                 # Clean up SPEC_OPENMP references
                 'fix_spec_openmp_refs': {
                     'pattern': r'defined\(SPEC_OPENMP\)',
+                    'flags': 0,
                     'replacement': 'defined(_OPENMP)',
-                    'description': 'Replace SPEC_OPENMP with standard _OPENMP'
+                    'description': 'Replace SPEC_OPENMP with standard _OPENMP',
+                    'trigger': 'defined(SPEC_OPENMP)'
                 },
 
                 # Clean up SPEC_SUPPRESS_OPENMP references
                 'fix_spec_suppress_openmp': {
                     'pattern': r'&& !defined\(SPEC_SUPPRESS_OPENMP\) && !defined\(SPEC_AUTO_SUPPRESS_OPENMP\)',
+                    'flags': 0,
                     'replacement': '',
-                    'description': 'Remove SPEC OpenMP suppression checks'
+                    'description': 'Remove SPEC OpenMP suppression checks',
+                    'trigger': '&& !defined(SPEC_SUPPRESS_OPENMP) && !defined(SPEC_AUTO_SUPPRESS_OPENMP)'
                 },
 
                 # Restore proper BIGM definition
                 'restore_bigm_definition': {
                     'pattern': r'#define BIGM 1\.0e7',
+                    'flags': 0,
                     'replacement': '#define BIGM 1.0e8  // Larger BigM for better numerical stability',
-                    'description': 'Use larger BigM value for non-SPEC version'
+                    'description': 'Use larger BigM value for non-SPEC version',
+                    'trigger': '#define BIGM 1.0e7'
                 },
 
                 # Enable full feature set
                 'enable_full_features': {
                     'pattern': r'#undef AT_ZERO\s*',
+                    'flags': 0,
                     'replacement': '#define AT_ZERO 3  // Enable AT_ZERO status for better optimization',
-                    'description': 'Re-enable AT_ZERO status'
+                    'description': 'Re-enable AT_ZERO status',
+                    'trigger': '#undef AT_ZERO'
                 },
 
                 # Restore comprehensive error handling
                 'restore_error_handling': {
                     'pattern': r'printf\(\s*"read error, exit\\n"\s*\);',
+                    'flags': 0,
                     'replacement': 'printf( "Error reading input file: %s\\n", net.inputfile );\n    printf( "Please check file format and permissions.\\n" );',
-                    'description': 'Add more descriptive error messages'
+                    'description': 'Add more descriptive error messages',
+                    'trigger': 'read error, exit'
                 },
 
                 # Enable memory debugging reporting
                 'enable_memory_reporting': {
                     'pattern': r'#if defined AT_HOME\s*\n(\s*printf.*?MB.*?\n)+#endif',
+                    'flags': 0,
                     'replacement': '#ifdef DEBUG\n\\1#endif',
-                    'description': 'Enable memory reporting in debug mode'
+                    'description': 'Enable memory reporting in debug mode',
+                    'trigger': '#if defined AT_HOME'
                 },
 
                 # Restore comprehensive output options
                 'restore_output_options': {
                     'pattern': r'fprintf\(\s*out,\s*"%.0f\\n",\s*flow_cost\(net\)\s*\);',
+                    'flags': 0,
                     'replacement': 'fprintf( out, "MCF Optimal Solution\\n" );\n  fprintf( out, "Objective value: %.0f\\n", flow_cost(net) );\n  fprintf( out, "Problem size: %ld nodes, %ld arcs\\n", net->n_trips, net->m );',
-                    'description': 'Add comprehensive output format'
+                    'description': 'Add comprehensive output format',
+                    'trigger': 'flow_cost(net)'
                 }
             }
 
@@ -396,65 +868,131 @@ class MCFSpecCodeCleaner:
                 # Fix broken conditional compilation
                 'fix_broken_conditionals': {
                     'pattern': r'#if defined\(SPEC\)\s*\n\s*\n#else\s*\n(.*?)\n#endif',
+                    'flags': re.DOTALL,
                     'replacement': r'\1',
-                    'description': 'Fix broken SPEC conditionals'
+                    'description': 'Fix broken SPEC conditionals',
+                    'trigger': '#if defined(SPEC)'
                 },
 
                 # Fix pragma omp sections that might be malformed
                 'fix_openmp_pragmas': {
                     'pattern': r'#pragma omp parallel for private\((.*?)\)\s*\n#endif\s*\nfor',
+                    'flags': re.DOTALL,
                     'replacement': '#pragma omp parallel for private(\\1)\nfor',
-                    'description': 'Fix malformed OpenMP pragmas'
+                    'description': 'Fix malformed OpenMP pragmas',
+                    'trigger': '#pragma omp parallel for private('
                 },
 
                 # Fix variable redefinition in implicit.c
                 'fix_arc_redefinition': {
-                    'pattern': r'(\s+register arc_t \*arcout, \*arcin, \*arcnew, \*stop, \*sorted_array, \*arc;.*?)(\s+arc_t\* arc = net->arcs;)',
-                    'replacement': r'\1\n       arc = net->arcs;',
-                    'description': 'Fix arc variable redefinition in implicit.c'
+                    'handler': fix_arc_redefinition,
+                    'trigger': ARC_REDEFINITION
                 }
             }
 
+            # Pre-compile every pattern once so clean_file_content can call .sub() directly.
+            # Each entry's 'trigger' is a literal that any match must contain, so the
+            # cleaning loops can skip the regex entirely when it is absent.
+            # 'flags' holds only what the pattern uses: DOTALL where a '.' must
+            # cross newlines, MULTILINE where '^'/'$' anchor at line boundaries.
+            for rules in (self.patterns, self.restorations, self.structure_fixes):
+                for pattern_info in rules.values():
+                    if 'pattern' in pattern_info:
+                        pattern_info['regex'] = re.compile(pattern_info['pattern'], pattern_info['flags'])
+                        # A pattern that is a plain literal is applied with str.replace
+                        literal = _literal_text(pattern_info['pattern'], pattern_info['flags'])
+                        if literal is not None:
+                            pattern_info['literal'] = (literal, _expand_template(pattern_info['replacement']))
+
+            # Runs of independent constant-replacement patterns that are applied back to
+            # back are fused into one alternation, so each run scans the file only once.
+            # Members must not overlap or feed each other, so the result matches applying
+            # them one by one, and must share their flags; patterns with backreferences
+            # stay separate.
+            fused_pattern_groups = [
+                ['spec_at_zero_undef', 'spec_debug_defines', 'spec_prototype_macro',
+                 'spec_numbered_output', 'spec_checksum_output', 'spec_hardcoded_limits',
+                 'spec_memory_buffers', 'spec_iteration_limits', 'spec_minimal_validation'],
+                ['spec_version_string', 'spec_thread_reporting', 'spec_force_single_thread',
+                 'spec_scanf_2param', 'spec_scanf_2param_variant', 'spec_scanf_3param'],
+            ]
+            self.fused_groups = {}
+            for names in fused_pattern_groups:
+                group = {
+                    'names': names,
+                    'regex': re.compile(
+                        '|'.join(f"(?P<{name}>{self.patterns[name]['pattern']})" for name in names),
+                        self.patterns[names[0]]['flags']
+                    ),
+                    # The callback returns replacements verbatim, so expand them up front
+                    'replacements': {
+                        name: _expand_template(self.patterns[name]['replacement']) for name in names
+                    },
+                    'triggers': tuple(self.patterns[name]['trigger'] for name in names)
+                }
+                for name in names:
+                    self.fused_groups[name] = group
+
+    def apply_fused_group(self, group, content, changes_made):
+        """Apply a fused group of patterns in a single pass over the content."""
+        if not any(trigger in content for trigger in group['triggers']):
+            return content
+
+        changed = set()
+
+        def replace(match):
+            replacement = group['replacements'][match.lastgroup]
+            # A rewrite to identical text is not a change, as with the != check
+            if replacement != match.group():
+                changed.add(match.lastgroup)
+            return replacement
+
+        content = group['regex'].sub(replace, content)
+
+        for name in group['names']:
+            if name in changed:
+                changes_made.append(self.patterns[name]['description'])
+
+        return content
+
     def clean_prototyp_h_specific(self, content):
         """Special handling for prototyp.h file structure and SPEC removal."""
-        if 'prototyp.h' not in str(getattr(self, 'current_file', '')):
+        if os.path.basename(getattr(self, 'current_file', '')) != 'prototyp.h':
+            return content
+
+        # Every rewrite below removes a defined(SPEC) clause, so only lines
+        # holding one are touched and files without any are returned as-is
+        if 'defined(SPEC)' not in content:
             return content
 
         # Specific prototyp.h cleaning
         lines = content.split('\n')
-        cleaned_lines = []
 
-        for line in lines:
+        for index, line in enumerate(lines):
+            if 'defined(SPEC)' not in line:
+                continue
+
             # Handle the specific SPEC macro removal
-            if 'defined(SPEC)' in line and '_PROTO_' in line:
+            if '_PROTO_' in line:
                 # Remove the || defined(SPEC) part
-                line = re.sub(r'\s*\|\|\s*defined\(SPEC\)', '', line)
+                line = PROTOTYP_SPEC_CONDITION_RE.sub('', line)
                 # Clean up any remaining formatting issues
-                line = re.sub(r'\s+\\\s*$', ' \\', line)
+                line = TRAILING_BACKSLASH_RE.sub(' \\', line)
 
             # Clean up the conditional compilation line
-            if line.strip().startswith('#if') and 'defined(__STDC__)' in line:
-                line = re.sub(
-                    r'defined\(__STDC__\)\s*\|\|\s*defined\(__cplusplus\)\s*\|\|\s*defined\(WANT_STDC_PROTO\)\s*\|\|\s*defined\(SPEC\)',
+            if 'defined(__STDC__)' in line and line.lstrip().startswith('#if'):
+                line = PROTOTYP_CONDITION_RE.sub(
                     'defined(__STDC__) || defined(__cplusplus) || defined(WANT_STDC_PROTO)',
                     line
                 )
 
-            cleaned_lines.append(line)
+            lines[index] = line
 
-        # Join back and clean up any extra whitespace
-        content = '\n'.join(cleaned_lines)
+        content = '\n'.join(lines)
 
-        # Remove any orphaned SPEC references
-        content = re.sub(r'\|\|\s*defined\(SPEC\)', '', content)
-
-        # Ensure proper formatting of the _PROTO_ macro definition
-        content = re.sub(
-            r'(#if\s+defined\(__STDC__\)\s*\|\|\s*defined\(__cplusplus\)\s*\|\|\s*defined\(WANT_STDC_PROTO\)\s*\n)(#define _PROTO_\(\s*args\s*\)\s*args\s*\n)(#else\s*\n)(#define _PROTO_\(\s*args\s*\)\s*\n)(#endif)',
-            r'\1\2\3\4\5',
-            content,
-            flags=re.MULTILINE
-        )
+        # Remove any orphaned SPEC references, including ones split across lines
+        if 'defined(SPEC)' in content:
+            content = ORPHAN_SPEC_CONDITION_RE.sub('', content)
 
         return content
 
@@ -479,25 +1017,57 @@ class MCFSpecCodeCleaner:
 
         return issues
 
+    def can_match(self, pattern_info, content, has_spec):
+        """Return False when the rule's trigger literal shows it cannot match content."""
+        trigger = pattern_info['trigger']
+        # No replacement introduces "SPEC", so a file that starts without it
+        # never needs the rules keyed on it, and their triggers are not rescanned
+        if not has_spec and 'SPEC' in trigger:
+            return False
+        return trigger in content
+
+    def apply_rule(self, pattern_info, content, changes_made):
+        """Apply one regex rule to content, recording it when the content changes."""
+        if 'literal' in pattern_info:
+            new_content = content.replace(*pattern_info['literal'])
+            if new_content != content:
+                changes_made.append(pattern_info['description'])
+            return new_content
+
+        new_content, count = pattern_info['regex'].subn(pattern_info['replacement'], content)
+        # Some rules rewrite a match to identical text (conditional normalisation,
+        # header guards), so matched content still has to be compared; a miss
+        # returns content itself and skips the comparison entirely
+        if count and new_content != content:
+            changes_made.append(pattern_info['description'])
+        return new_content
+
     def clean_file_content(self, content):
         """Clean SPEC-specific code from file content."""
         original_content = content
         changes_made = []
+        has_spec = 'SPEC' in content
+        # The file-specific fixes are selected by the name of the file being cleaned
+        file_name = os.path.basename(self.current_file)
+        is_mcf_c = file_name == 'mcf.c'
+
+        # Skip processing SPEC-only files entirely
+        if file_name in SPEC_ONLY_FILES:
+            return None, ['SPEC-only file skipped']
 
         # Apply structure fixes first
         for pattern_name, pattern_info in self.structure_fixes.items():
-            old_content = content
-            content = re.sub(
-                pattern_info['pattern'],
-                pattern_info['replacement'],
-                content,
-                flags=re.MULTILINE | re.DOTALL
-            )
-            if content != old_content:
-                changes_made.append(pattern_info['description'])
+            if not self.can_match(pattern_info, content, has_spec):
+                continue
+
+            if 'handler' in pattern_info:
+                content = pattern_info['handler'](content, changes_made)
+                continue
+
+            content = self.apply_rule(pattern_info, content, changes_made)
 
         # Special handling for prototyp.h
-        if hasattr(self, 'current_file') and 'prototyp.h' in str(self.current_file):
+        if file_name == 'prototyp.h':
             old_content = content
             content = self.clean_prototyp_h_specific(content)
             if content != old_content:
@@ -505,294 +1075,130 @@ class MCFSpecCodeCleaner:
 
         # Apply main cleaning patterns
         for pattern_name, pattern_info in self.patterns.items():
-            old_content = content
+            # Fused patterns run together when the first member of their group is reached
+            fused_group = self.fused_groups.get(pattern_name)
+            if fused_group is not None:
+                if pattern_name == fused_group['names'][0]:
+                    content = self.apply_fused_group(fused_group, content, changes_made)
+                continue
 
-            # Handle multi-line patterns
-            if pattern_name in ['spec_stdint_includes', 'spec_qsort_calls', 'spec_timing_conditionals', 'spec_thread_output']:
-                content = re.sub(
-                    pattern_info['pattern'],
-                    pattern_info['replacement'],
-                    content,
-                    flags=re.MULTILINE | re.DOTALL
-                )
-            else:
-                content = re.sub(
-                    pattern_info['pattern'],
-                    pattern_info['replacement'],
-                    content,
-                    flags=re.MULTILINE
-                )
+            if not self.can_match(pattern_info, content, has_spec):
+                continue
 
-            if content != old_content:
-                changes_made.append(pattern_info['description'])
+            # Handlers rewrite the content themselves and record their own changes
+            if 'handler' in pattern_info:
+                content = pattern_info['handler'](content, changes_made)
+                continue
+
+            content = self.apply_rule(pattern_info, content, changes_made)
 
         # Apply restorations
         for pattern_name, pattern_info in self.restorations.items():
-            old_content = content
-            content = re.sub(
-                pattern_info['pattern'],
-                pattern_info['replacement'],
-                content,
-                flags=re.MULTILINE
-            )
-            if content != old_content:
-                changes_made.append(pattern_info['description'])
+            if not self.can_match(pattern_info, content, has_spec):
+                continue
+
+            content = self.apply_rule(pattern_info, content, changes_made)
 
         # Additional cleanup passes
+        if has_spec:
+            # Remove any remaining SPEC references in comments
+            content = strip_spec_comments(content)
 
-        # Handle SPEC scanf patterns specifically
-        content = re.sub(
-            r'#ifdef SPEC\s*\n\s*if\(\s*sscanf\(\s*instring,\s*"%" PRId64 " %" PRId64\s*,\s*&t,\s*&h\s*\)\s*!=\s*2\s*\)\s*\n#else\s*\n\s*if\(\s*sscanf\(\s*instring,\s*"%ld %ld",\s*&t,\s*&h\s*\)\s*!=\s*2\s*\)\s*\n#endif',
-            r'    if( sscanf( instring, "%ld %ld", &t, &h ) != 2 )',
-            content,
-            flags=re.MULTILINE | re.DOTALL
-        )
-
-        content = re.sub(
-            r'#ifdef SPEC\s*\n\s*if\(\s*sscanf\(\s*instring,\s*"%" PRId64 " %" PRId64\s*,\s*&t,\s*&h\s*\)\s*!=\s*2\s*\|\|\s*t\s*>\s*h\s*\)\s*\n#else\s*\n\s*if\(\s*sscanf\(\s*instring,\s*"%ld %ld",\s*&t,\s*&h\s*\)\s*!=\s*2\s*\|\|\s*t\s*>\s*h\s*\)\s*\n#endif',
-            r'        if( sscanf( instring, "%ld %ld", &t, &h ) != 2 || t > h )',
-            content,
-            flags=re.MULTILINE | re.DOTALL
-        )
-
-        content = re.sub(
-            r'#ifdef SPEC\s*\n\s*if\(\s*sscanf\(\s*instring,\s*"%" PRId64 " %" PRId64 " %" PRId64\s*,\s*&t,\s*&h,\s*&c\s*\)\s*!=\s*3\s*\)\s*\n#else\s*\n\s*if\(\s*sscanf\(\s*instring,\s*"%ld %ld %ld",\s*&t,\s*&h,\s*&c\s*\)\s*!=\s*3\s*\)\s*\n#endif',
-            r'        if( sscanf( instring, "%ld %ld %ld", &t, &h, &c ) != 3 )',
-            content,
-            flags=re.MULTILINE | re.DOTALL
-        )
-
-        # Remove any remaining SPEC references in comments
-        content = re.sub(r'/\*.*?SPEC.*?\*/', '', content, flags=re.DOTALL)
-
-        # Remove SPEC from copyright lines
-        content = re.sub(r'SPEC version\s*\n', '\n', content)
+            # Remove SPEC from copyright lines
+            content = SPEC_VERSION_LINE_RE.sub('\n', content)
 
         # Clean up extra whitespace
-        content = re.sub(r'\n\s*\n\s*\n', '\n\n', content)
+        content = collapse_blank_lines(content)
 
-        # Remove any remaining SPEC conditional compilation directives
-        content = re.sub(r'#if.*?defined\(SPEC\).*?\n', '', content)
-        content = re.sub(r'#ifdef\s+SPEC.*?\n', '', content)
-        content = re.sub(r'#ifndef\s+SPEC.*?\n', '', content)
+        # Resolve the remaining SPEC conditionals to their non-SPEC branch, then drop
+        # any SPEC directive lines that could not be paired with an #endif
+        if has_spec:
+            content = strip_spec_conditionals(content, changes_made)
+            content = SPEC_IF_DIRECTIVE_RE.sub('', content)
+            content = SPEC_IFDEF_DIRECTIVE_RE.sub('', content)
+            content = SPEC_IFNDEF_DIRECTIVE_RE.sub('', content)
 
         # Remove spec_qsort function calls
-        content = re.sub(r'spec_qsort\(', 'qsort(', content)
+        content = content.replace('spec_qsort(', 'qsort(')
 
         # Clean up OpenMP conditionals more thoroughly
-        content = re.sub(
-            r'#if \(defined\(_OPENMP\) \|\| defined\(SPEC_OPENMP\)\) && !defined\(SPEC_SUPPRESS_OPENMP\) && !defined\(SPEC_AUTO_SUPPRESS_OPENMP\)',
-            '#ifdef _OPENMP',
-            content
-        )
+        if has_spec:
+            content = content.replace(OPENMP_CONDITIONAL, '#ifdef _OPENMP')
 
         # Fix PRId64 format specifiers that might remain
-        content = re.sub(r'%" PRId64 "', '%ld', content)
-        content = re.sub(r'%"\s*PRId64\s*"', '%ld', content)
+        content = content.replace('%" PRId64 "', '%ld')
+        if 'PRId64' in content:
+            content = PRID64_SPACED_FORMAT_RE.sub('%ld', content)
 
         # Fix broken printf statements from string replacement
-        content = re.sub(r'printf\(\s*"\s*\n', 'printf( "\\n', content)
-        content = re.sub(r'printf\(\s*"([^"]*?)"\s*\n\s*"([^"]*?)"', r'printf( "\1\2"', content)
+        has_printf = 'printf(' in content
+        if has_printf:
+            content = BROKEN_PRINTF_OPEN_RE.sub('printf( "\\n', content)
+            content = SPLIT_PRINTF_STRING_RE.sub(r'printf( "\1\2"', content)
 
-        # Fix any broken multiline strings
-        lines = content.split('\n')
-        fixed_lines = []
-        i = 0
-        while i < len(lines):
-            line = lines[i]
-            # Check for broken printf statements
-            if 'printf(' in line and line.count('"') % 2 == 1:
-                # This line has an unclosed quote, look for the closing line
-                j = i + 1
-                while j < len(lines) and lines[j].strip() != '' and not lines[j].strip().endswith('");'):
-                    line += lines[j].strip()
-                    j += 1
-                if j < len(lines):
-                    line += lines[j].strip()
-                    i = j
-            fixed_lines.append(line)
-            i += 1
-
-        content = '\n'.join(fixed_lines)
-
-        # Fix any remaining broken conditionals from SPEC removal
-        lines = content.split('\n')
-        cleaned_lines = []
-        i = 0
-        while i < len(lines):
-            line = lines[i].strip()
-            # Skip empty conditionals that might be left after SPEC removal
-            if line == '#else' and i + 1 < len(lines) and lines[i + 1].strip() == '#endif':
-                i += 2  # Skip both #else and #endif
-                continue
-            cleaned_lines.append(lines[i])
-            i += 1
-
-        content = '\n'.join(cleaned_lines)
-
-        # Fix any broken #endif statements left over
-        lines = content.split('\n')
-        cleaned_lines = []
-        endif_balance = 0
-
-        for line in lines:
-            if line.strip().startswith('#if') or line.strip().startswith('#ifdef') or line.strip().startswith('#ifndef'):
-                endif_balance += 1
-                cleaned_lines.append(line)
-            elif line.strip() == '#endif':
-                if endif_balance > 0:
-                    endif_balance -= 1
-                    cleaned_lines.append(line)
-                # Skip orphaned #endif statements
-            elif line.strip().startswith('#else') or line.strip().startswith('#elif'):
-                if endif_balance > 0:
-                    cleaned_lines.append(line)
-                # Skip orphaned #else/#elif statements
-            else:
-                cleaned_lines.append(line)
-
-        content = '\n'.join(cleaned_lines)
+        # Join broken printf strings and drop empty or orphaned conditionals; only
+        # printf lines and #else/#elif/#endif lines can change
+        if has_printf or '#e' in content:
+            content = '\n'.join(_fix_line_structure(content.split('\n')))
 
         # Special handling for mcf.c main function issues
-        if 'mcf.c' in str(self.current_file):
-            # Fix the broken version string from SPEC removal
-            content = re.sub(
-                r'printf\(\s*"\s*\nMCF version',
-                'printf( "\\nMCF version',
-                content
-            )
-
-            # Ensure complete printf statements
-            content = re.sub(
-                r'printf\(\s*"([^"]*?)"\s*\n([^"]*?)"([^"]*?)"',
-                r'printf( "\1\2\3"',
-                content,
-                flags=re.MULTILINE
-            )
-
-            # Fix any remaining broken strings
-            content = re.sub(
-                r'printf\(\s*"\s*\n\s*MCF version',
-                'printf( "\\nMCF version',
-                content
-            )
+        if is_mcf_c:
+            for regex, replacement, trigger in MCF_C_VERSION_REPAIRS:
+                if trigger in content:
+                    content = regex.sub(replacement, content)
 
         # Final pass: ensure we have proper includes
-        if 'mcf.c' in str(self.current_file) or 'main' in content:
+        if is_mcf_c or 'main' in content:
             if '#include <time.h>' not in content:
                 content = content.replace('#include "mcf.h"', '#include "mcf.h"\n#include <time.h>')
                 changes_made.append('Add time.h include to main file')
 
         # Ensure we don't include SPEC files that won't exist
-        content = re.sub(r'#include\s*"spec_qsort\.h"', '', content)
+        if 'spec_qsort.h' in content:
+            content = SPEC_QSORT_INCLUDE_RE.sub('', content)
 
         # Clean up header comments with SPEC version
-        content = re.sub(r'/\*+\s*\n.*?SPEC version\s*\n', '/*\n', content, flags=re.MULTILINE)
+        if has_spec:
+            content = SPEC_HEADER_COMMENT_RE.sub('/*\n', content)
 
         # Final comprehensive fixes for mcf.c
-        if 'mcf.c' in str(self.current_file):
+        if is_mcf_c:
             # Fix all remaining PRId64 references
-            content = re.sub(r'%" PRId64 "', '"%ld"', content)
-            content = re.sub(r'PRId64', 'ld', content)
-
-            # Fix the specific broken printf from version string replacement
-            content = re.sub(
-                r'printf\(\s*"\s*\nMCF version 1\.11\\n"\s*\);',
-                'printf( "\\nMCF version 1.11\\n" );',
-                content
-            )
+            content = content.replace('%" PRId64 "', '"%ld"')
+            content = content.replace('PRId64', 'ld')
 
-            # Fix concatenated printf statements that got merged incorrectly
-            content = re.sub(
-                r'printf\(\s*"([^"]*?)"\s*\);printf\(',
-                r'printf( "\1" );\n  printf(',
-                content
-            )
-
-            # Fix the specific copyright line with broken escaping
-            content = re.sub(
-                r'"([^"]*?)"\\"([^"]*?)"',
-                r'"\1\2"',
-                content
-            )
-
-            # Fix any instances where statements got merged without proper line breaks
-            content = re.sub(
-                r';\s*([a-zA-Z_][a-zA-Z0-9_]*\s*\()',
-                r';\n  \1',
-                content
-            )
-
-            # Specifically fix the "GbR (LBW)" string issue
-            content = re.sub(
-                r'Weider "\\"GbR \(LBW\)\\n"',
-                r'Weider GbR (LBW)\\n"',
-                content
-            )
-
-            # Fix multiline printf statements that got broken
-            content = re.sub(
-                r'printf\(\s*"([^"]*?)\s*\n\s*([A-Za-z][^"]*?)"\s*\);',
-                r'printf( "\1\2" );',
-                content,
-                flags=re.MULTILINE | re.DOTALL
-            )
-
-            # Ensure proper string termination and spacing
-            content = re.sub(
-                r'printf\(\s*"\s*\n([^"]*?)\\n"\s*\);',
-                r'printf( "\\n\1\\n" );',
-                content
-            )
-
-            # Fix the specific copyright string issue
-            content = re.sub(
-                r'"GbR \(LBW\)\\n"\s*\);',
-                r'"GbR (LBW)\\n" );',
-                content
-            )
+            for regex, replacement, trigger in MCF_C_FINAL_REPAIRS:
+                if trigger in content:
+                    if isinstance(regex, str):
+                        content = content.replace(regex, replacement)
+                    else:
+                        content = regex.sub(replacement, content)
 
         # Additional fix for implicit.c variable conflicts
-        if 'implicit.c' in str(self.current_file):
-            # Fix the specific arc variable redefinition issue
-            # The problem is 'arc' is declared as register variable and then redeclared later
-            content = re.sub(
-                r'(\s+)arc_t\* arc = net->arcs;',
-                r'\1arc = net->arcs;',
-                content
-            )
-
-            # Also fix any other similar redefinitions
-            content = re.sub(
-                r'(\s+)arc_t \*arc = ',
-                r'\1arc = ',
-                content
-            )
-
-        # Remove any remaining SPEC-only file references
-        if any(name in str(self.current_file) for name in ['spec_qsort.c', 'spec_qsort.h', 'inttypes.h']):
-            # Skip processing SPEC-only files entirely
-            return None, ['SPEC-only file skipped']
+        if file_name == 'implicit.c':
+            for regex, replacement, trigger in IMPLICIT_C_REPAIRS:
+                if trigger in content:
+                    content = regex.sub(replacement, content)
 
         return content, changes_made
 
     def should_process_file(self, filepath):
         """Check if file should be processed based on extension."""
         extensions = {'.c', '.h', '.cpp', '.hpp', '.cc', '.cxx'}
-        return filepath.suffix.lower() in extensions
+        return os.path.splitext(filepath)[1].lower() in extensions
 
     def process_file(self, input_path, output_path):
         """Process a single file."""
         self.current_file = input_path  # Store for context-specific fixes
 
         # Skip SPEC-only files entirely
-        if input_path.name in ['spec_qsort.c', 'spec_qsort.h', 'inttypes.h']:
+        if input_path.name in SPEC_ONLY_FILES:
             print(f"Skipping SPEC-only file: {input_path.name}")
             return ['SPEC-only file skipped']
 
         try:
-            with open(input_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
+            data = input_path.read_bytes()
+            content = decode_source(data)
 
             cleaned_content, changes = self.clean_file_content(content)
 
@@ -810,8 +1216,12 @@ class MCFSpecCodeCleaner:
             # Create output directory if it doesn't exist
             output_path.parent.mkdir(parents=True, exist_ok=True)
 
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(cleaned_content)
+            # Nothing was cleaned and decoding lost nothing, so the input
+            # already is the output
+            if cleaned_content == content and content.encode('utf-8') == data:
+                shutil.copy2(input_path, output_path)
+            else:
+                output_path.write_bytes(cleaned_content.encode('utf-8'))
 
             return changes
 
@@ -819,8 +1229,12 @@ class MCFSpecCodeCleaner:
             print(f"Error processing {input_path}: {e}")
             return []
 
-    def process_directory(self, input_dir, output_dir):
-        """Process all files in a directory recursively."""
+    def process_directory(self, input_dir, output_dir, max_workers=None):
+        """Process all files in a directory recursively.
+
+        Source files are cleaned in parallel using up to max_workers
+        processes (default: one per CPU).
+        """
         input_path = Path(input_dir)
         output_path = Path(output_dir)
 
@@ -830,34 +1244,66 @@ class MCFSpecCodeCleaner:
         total_files = 0
         processed_files = 0
         total_changes = []
+        source_files = []
+
+        for entry in iter_files(input_path):
+            total_files += 1
+
+            # Calculate relative path and output location
+            relative_path = Path(os.path.relpath(entry.path, input_path))
+            output_file = output_path / relative_path
 
-        for file_path in input_path.rglob('*'):
-            if file_path.is_file():
-                total_files += 1
+            if self.should_process_file(entry.name):
+                source_files.append((relative_path, Path(entry.path), output_file))
+            else:
+                # Copy non-source files as-is (excluding SPEC-specific files)
+                if entry.name.lower() not in ['makefile', 'spec_qsort.c', 'spec_qsort.h', 'inttypes.h']:
+                    output_file.parent.mkdir(parents=True, exist_ok=True)
+                    shutil.copy2(entry.path, output_file)
+
+        # Files are independent, so clean them across worker processes; map()
+        # keeps results in walk order for the report below
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(
+                _process_file_worker,
+                [(file_path, output_file) for _, file_path, output_file in source_files
+                 if file_path.name not in SPEC_ONLY_FILES],
+                chunksize=16
+            )
 
-                if self.should_process_file(file_path):
-                    # Calculate relative path and output location
-                    relative_path = file_path.relative_to(input_path)
-                    output_file = output_path / relative_path
+            for relative_path, file_path, output_file in source_files:
+                print(f"Processing: {relative_path}")
 
-                    print(f"Processing: {relative_path}")
+                if file_path.name in SPEC_ONLY_FILES:
+                    # Skipped without being read; handled here so its message stays in order
                     changes = self.process_file(file_path, output_file)
+                else:
+                    changes = next(results)
 
-                    if changes:
-                        processed_files += 1
-                        total_changes.extend(changes)
-                        print(f"  Changes: {', '.join(changes)}")
-                    else:
-                        print(f"  No SPEC code found")
+                if changes:
+                    processed_files += 1
+                    total_changes.extend(changes)
+                    print(f"  Changes: {', '.join(changes)}")
                 else:
-                    # Copy non-source files as-is (excluding SPEC-specific files)
-                    if file_path.name.lower() not in ['makefile', 'spec_qsort.c', 'spec_qsort.h', 'inttypes.h']:
-                        output_file = output_path / file_path.relative_to(input_path)
-                        output_file.parent.mkdir(parents=True, exist_ok=True)
-                        shutil.copy2(file_path, output_file)
+                    print(f"  No SPEC code found")
 
         return total_files, processed_files, total_changes
 
+# Per-process cleaner shared by the CLI and process_directory's worker pool;
+# forked workers inherit the parent's instance instead of rebuilding it
+_DEFAULT_CLEANER = None
+
+def get_cleaner():
+    """Return this process's MCFSpecCodeCleaner, building it on first use."""
+    global _DEFAULT_CLEANER
+    if _DEFAULT_CLEANER is None:
+        _DEFAULT_CLEANER = MCFSpecCodeCleaner()
+    return _DEFAULT_CLEANER
+
+def _process_file_worker(paths):
+    input_file, output_file = paths
+    return get_cleaner().process_file(input_file, output_file)
+
 def main():
     parser = argparse.ArgumentParser(
         description='Remove SPEC proprietary code from MCF optimizer source',
@@ -881,10 +1327,12 @@ Examples:
                        help='Verbose output')
     parser.add_argument('--dry-run', action='store_true',
                        help='Show what would be changed without modifying files')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                       help='Number of worker processes for directories (default: CPU count)')
 
     args = parser.parse_args()
 
-    cleaner = MCFSpecCodeCleaner()
+    cleaner = get_cleaner()
     input_path = Path(args.input)
     output_path = Path(args.output)
 
@@ -892,8 +1340,7 @@ Examples:
         if input_path.is_file():
             # Process single file
             if args.dry_run:
-                with open(input_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
+                content = read_source(input_path)
                 _, changes = cleaner.clean_file_content(content)
                 print(f"Would apply changes to {input_path}:")
                 for change in changes:
@@ -912,18 +1359,17 @@ Examples:
             # Process directory
             if args.dry_run:
                 print("DRY RUN - No files will be modified")
-                for file_path in input_path.rglob('*'):
-                    if file_path.is_file() and cleaner.should_process_file(file_path):
-                        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            content = f.read()
+                for entry in iter_files(input_path):
+                    if cleaner.should_process_file(entry.name):
+                        content = read_source(entry.path)
                         _, changes = cleaner.clean_file_content(content)
                         if changes:
-                            print(f"\nWould modify {file_path.relative_to(input_path)}:")
+                            print(f"\nWould modify {os.path.relpath(entry.path, input_path)}:")
                             for change in changes:
                                 print(f"  - {change}")
             else:
                 total_files, processed_files, all_changes = cleaner.process_directory(
-                    input_path, output_path
+                    input_path, output_path, max_workers=args.jobs
                 )
 
                 print(f"\nSummary:")
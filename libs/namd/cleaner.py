@@ -1,8 +1,78 @@
+import io
 import os
 import re
 import shutil
+import stat
 import sys
 
+# Whole lines that are exactly one of the SPEC directives (surrounding whitespace
+# aside), with their newline; [^\S\n] is whitespace within a line as str.strip() sees it
+SPEC_DIRECTIVE_LINE_RE = re.compile(
+    r'^[^\S\n]*(?:'
+    r'(?P<drop>#ifndef SPEC|#endif // !SPEC)'
+    r'|(?P<win32>#if defined\(WIN32\) \|\| defined\(SPEC_NEED_ERFC\))'
+    r'|(?P<erfc>#ifdef SPEC_NEED_ERFC)'
+    r')[^\S\n]*(?:\n|\Z)',
+    re.MULTILINE
+)
+SPEC_DIRECTIVE_REPLACEMENTS = {
+    'drop': '',
+    'win32': '#if defined(WIN32)\n',
+    'erfc': '#if 0  // originally: #ifdef SPEC_NEED_ERFC\n',
+}
+
+def replace_spec_directive(match):
+    """Return the replacement line for one SPEC_DIRECTIVE_LINE_RE match."""
+    return SPEC_DIRECTIVE_REPLACEMENTS[match.lastgroup]
+
+def sync_tree(src_dir, dst_dir, top_level=True):
+    """
+    Makes dst_dir a copy of src_dir, copying files with shutil.copy2. Files left
+    by an earlier run are kept while their size and modification time still
+    match the source; everything else the source no longer has is removed, except
+    the top-level Makefile and apoa1.input that main() copies in. main.C is not
+    kept: it is removed and renamed from a fresh copy of spec_namd.C on every run.
+    """
+    os.makedirs(dst_dir, exist_ok=True)
+    with os.scandir(src_dir) as entries:
+        sources = {entry.name: entry for entry in entries}
+
+    generated = {"Makefile", "apoa1.input"} if top_level else set()
+
+    with os.scandir(dst_dir) as entries:
+        for entry in entries:
+            if entry.name in sources or entry.name in generated:
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                shutil.rmtree(entry.path)
+            else:
+                os.remove(entry.path)
+
+    for name, entry in sources.items():
+        dst = os.path.join(dst_dir, name)
+        try:
+            dst_stat = os.stat(dst, follow_symlinks=False)
+        except FileNotFoundError:
+            dst_stat = None
+
+        if entry.is_dir():
+            if dst_stat is not None and not stat.S_ISDIR(dst_stat.st_mode):
+                os.remove(dst)
+            sync_tree(entry.path, dst, top_level=False)
+            continue
+
+        if dst_stat is not None:
+            src_stat = entry.stat()
+            if (stat.S_ISREG(dst_stat.st_mode)
+                    and dst_stat.st_size == src_stat.st_size
+                    and dst_stat.st_mtime_ns == src_stat.st_mtime_ns):
+                continue
+            if stat.S_ISDIR(dst_stat.st_mode):
+                shutil.rmtree(dst)
+            else:
+                os.remove(dst)
+        shutil.copy2(entry.path, dst)
+
 def main(input_dir, output_dir):
     """
     Cleans and transforms source files from input_dir, outputs to output_dir:
@@ -14,10 +84,10 @@ def main(input_dir, output_dir):
     6. Copies 'Makefile' (located alongside this script) into the output_dir.
     """
 
-    # Copy the entire input directory to output directory
-    if os.path.exists(output_dir):
-        shutil.rmtree(output_dir)
-    shutil.copytree(input_dir, output_dir)
+    # Copy the entire input directory to output directory; a tree left by an
+    # earlier run is updated in place. Every step below gives the same
+    # result when run again on its own output
+    sync_tree(input_dir, output_dir)
     print(f"Copied '{input_dir}' to '{output_dir}'")
 
     # Step 1: Replace SSE2 block in ComputeNonbondedBase.h
@@ -55,29 +125,22 @@ def main(input_dir, output_dir):
         for filename in filenames:
             file_path = os.path.join(dirpath, filename)
             try:
-                with open(file_path, "r") as f:
-                    lines = f.readlines()
-
-                new_lines = []
-                modified = False
-
-                for line in lines:
-                    stripped = line.strip()
-                    if stripped in ("#ifndef SPEC", "#endif // !SPEC"):
-                        modified = True
-                        continue
-                    elif stripped == "#if defined(WIN32) || defined(SPEC_NEED_ERFC)":
-                        new_lines.append("#if defined(WIN32)\n")
-                        modified = True
-                    elif stripped == "#ifdef SPEC_NEED_ERFC":
-                        new_lines.append("#if 0  // originally: #ifdef SPEC_NEED_ERFC\n")
-                        modified = True
-                    else:
-                        new_lines.append(line)
+                with open(file_path, "rb") as f:
+                    data = f.read()
+
+                # Every directive rewritten below mentions SPEC
+                if b"SPEC" not in data:
+                    continue
+
+                # Decoded exactly as open(file_path, "r").read() would
+                content = io.TextIOWrapper(io.BytesIO(data)).read()
+
+                # One scan rewrites every matching directive line
+                content, modified = SPEC_DIRECTIVE_LINE_RE.subn(replace_spec_directive, content)
 
                 if modified:
                     with open(file_path, "w") as f:
-                        f.writelines(new_lines)
+                        f.write(content)
                     print(f"Cleaned '{file_path}'")
 
             except Exception as e:
@@ -90,7 +153,8 @@ def main(input_dir, output_dir):
                 old_path = os.path.join(dirpath, filename)
                 new_path = os.path.join(dirpath, "main.C")
 
-                os.rename(old_path, new_path)
+                # An earlier run may have left a main.C behind
+                os.replace(old_path, new_path)
                 print(f"Renamed '{filename}' to 'main.C'")
 
                 break
@@ -0,0 +1,23 @@
+"""
+Directory walking shared by the benchmark cleaners in libs/.
+
+The cleaners run as standalone scripts, so each one puts this directory on
+sys.path before importing from here.
+"""
+
+import os
+
+def iter_files(root):
+    """Yield a DirEntry for every regular file under root, recursively.
+
+    os.scandir reports the entry type from readdir, so unlike Path.rglob
+    no extra stat call is needed per entry. Symlinked files are followed,
+    as rglob('*') with is_file() did; symlinked directories are not
+    descended into.
+    """
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from iter_files(entry.path)
+            elif entry.is_file():
+                yield entry
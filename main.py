@@ -45,6 +45,18 @@ from typing import Optional
 from installation import main as install_cpu2017
 from simple_spec import SimpleSpec
 
+def _scan_dir(path) -> Optional[list]:
+    """Return the entries of directory path, or None if it cannot be listed."""
+    try:
+        with os.scandir(path) as entries:
+            return list(entries)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    except OSError as e:
+        # e.g. no permission to list it; say why before it is reported as missing
+        print(f"❌ Cannot read directory {path}: {e}")
+        return None
+
 class CPU2017Runner:
     def __init__(self, iso_path: str, install_dir: str, output_dir: str, verbose: bool = False):
         self.iso_path = Path(iso_path)
@@ -148,11 +160,15 @@ class CPU2017Runner:
         missing_benchmarks = []
         for benchmark_id, name in required_benchmarks.items():
             benchmark_dir = benchspec_dir / benchmark_id / 'src'
-            if not benchmark_dir.exists():
+            # Opening the path resolves its name as the filesystem does
+            source_entries = _scan_dir(benchmark_dir)
+            if source_entries is None:
                 missing_benchmarks.append(f"{name} ({benchmark_id})")
             else:
-                # Count source files
-                source_files = list(benchmark_dir.glob('*.c')) + list(benchmark_dir.glob('*.cpp'))
+                # Count source files; normcase folds case where glob() did (Windows)
+                source_files = [entry for entry in source_entries
+                                if os.path.normcase(entry.name).endswith(('.c', '.cpp'))
+                                and entry.is_file()]
                 print(f"   ✅ {name}: {len(source_files)} source files found")
         
         if missing_benchmarks: